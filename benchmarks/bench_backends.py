@@ -0,0 +1,42 @@
+"""Сравнение способов извлечения данных: BeautifulSoup и lxml + XPath.
+
+Запуск: python benchmarks/bench_backends.py --pages 300
+"""
+import argparse
+import time
+
+from corpus import pep_pages, whats_new_pages
+
+from extractors import PEP_STATUS_EXTRACTORS, WHATS_NEW_EXTRACTORS
+
+
+def measure(extract, pages):
+    started = time.perf_counter()
+    results = [extract(page) for page in pages]
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=300)
+    args = parser.parse_args()
+
+    print(f'{"страницы":<12} {"бэкенд":<8} {"мс/стр":>8} {"ускорение":>10}')
+    for name, pages, extractors in (
+        ('pep', pep_pages(args.pages), PEP_STATUS_EXTRACTORS),
+        ('whats-new', whats_new_pages(args.pages), WHATS_NEW_EXTRACTORS),
+    ):
+        timings = {
+            backend: measure(extract, pages)
+            for backend, extract in extractors.items()
+        }
+        reference_time, reference_results = timings['bs4']
+        for backend, (seconds, results) in timings.items():
+            assert results == reference_results, backend
+            print(f'{name:<12} {backend:<8}'
+                  f' {seconds / len(pages) * 1000:>8.2f}'
+                  f' {reference_time / seconds:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Сравнение хранилищ кеша: размер на диске и время тёплого запуска.
+
+Запуск: python benchmarks/bench_cache.py --peps 600
+
+Для каждого хранилища все страницы снимка загружаются дважды
+в отдельном каталоге: холодный проход заполняет кеш, тёплый — новой
+сессией с теми же файлами, то есть с чтением ответов с диска.
+Разбор страниц не выполняется, чтобы замерялся только кеш.
+"""
+import argparse
+from contextlib import contextmanager
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import time
+
+from server import serve_snapshot
+from snapshot import build_snapshot
+
+from configs import configure_argument_parser, configure_session
+from constants import SEGMENTS_CACHE, SQLITE_CACHE
+from utils import get_response
+
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def disk_size(directory):
+    return sum(path.stat().st_size for path in Path(directory).iterdir())
+
+
+def measure(cache_backend, urls):
+    cli_args = configure_argument_parser(['pep']).parse_args(
+        ['pep', '--cache-backend', cache_backend]
+    )
+    with TemporaryDirectory() as cache_dir, working_directory(cache_dir):
+        timings = {}
+        for run in ('cold', 'warm'):
+            session = configure_session(cli_args)
+            started = time.perf_counter()
+            for url in urls:
+                get_response(session, url)
+            timings[run] = time.perf_counter() - started
+            session.close()
+        return timings, disk_size(cache_dir)
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--peps', type=int, default=600)
+    args = parser.parse_args()
+
+    print(f'{"хранилище":<10} {"МБ":>7} {"холодный, мс/стр":>17}'
+          f' {"тёплый, мс/стр":>15}')
+    with TemporaryDirectory() as snapshot_dir:
+        snapshot = build_snapshot(
+            snapshot_dir, peps=args.peps, versions=1, archive_size=0
+        )
+        with serve_snapshot(snapshot, latency=0, jitter=0) as (
+            base_url, _
+        ):
+            urls = [base_url] + [
+                f'{base_url}pep-{number:04d}/'
+                for number in range(1, args.peps + 1)
+            ]
+            for cache_backend in (SQLITE_CACHE, SEGMENTS_CACHE):
+                timings, size = measure(cache_backend, urls)
+                print(f'{cache_backend:<10} {size / 2 ** 20:>7.2f}'
+                      f' {timings["cold"] / len(urls) * 1000:>17.2f}'
+                      f' {timings["warm"] / len(urls) * 1000:>15.2f}')
+
+
+if __name__ == '__main__':
+    main_benchmark()
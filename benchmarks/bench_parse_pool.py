@@ -0,0 +1,62 @@
+"""Масштабирование разбора страниц PEP по числу процессов.
+
+Запуск: python benchmarks/bench_parse_pool.py --pages 600
+
+Загрузка в бенчмарке не участвует: измеряется только этап разбора,
+который в режиме --parse-workers выполняется в ProcessPoolExecutor.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+from corpus import pep_pages
+
+from extractors import extract_pep_status
+
+CHUNK_SIZE = 8
+
+
+def worker_counts(max_workers):
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    return counts + [max_workers]
+
+
+def measure(pages, workers):
+    started = time.perf_counter()
+    if workers is None:
+        statuses = list(map(extract_pep_status, pages))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            statuses = list(
+                pool.map(extract_pep_status, pages, chunksize=CHUNK_SIZE)
+            )
+    assert len(statuses) == len(pages)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=600)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pages = pep_pages(args.pages)
+    megabytes = sum(map(len, pages)) / 2 ** 20
+    print(f'{len(pages)} страниц, {megabytes:.1f} МБ HTML')
+    baseline = measure(pages, None)
+    print(f'{"процессы":>10} {"секунды":>10} {"стр/с":>10} {"ускорение":>10}')
+    print(f'{"-":>10} {baseline:>10.2f} {len(pages) / baseline:>10.0f}'
+          f' {1:>10.2f}')
+    for workers in worker_counts(args.max_workers):
+        elapsed = measure(pages, workers)
+        print(f'{workers:>10} {elapsed:>10.2f} {len(pages) / elapsed:>10.0f}'
+              f' {baseline / elapsed:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Память на строку результата при разных представлениях строк.
+
+Запуск: python benchmarks/bench_rows.py --rows 200000
+
+Заголовок и автор берутся со страницы «What's New» из корпуса, ссылки
+у строк разные. Значения полей создаются заранее, поэтому tracemalloc
+учитывает только сами объекты строк: кортежи, именованные кортежи
+из rows, словари и классы с __slots__ и без.
+"""
+import argparse
+import time
+import tracemalloc
+
+from corpus import whats_new_pages
+
+from extractors import extract_whats_new_info
+from rows import WhatsNewRow
+
+
+class SlotsRow:
+    __slots__ = WhatsNewRow._fields
+
+    def __init__(self, link, title, author):
+        self.link = link
+        self.title = title
+        self.author = author
+
+
+class PlainRow:
+    def __init__(self, link, title, author):
+        self.link = link
+        self.title = title
+        self.author = author
+
+
+ROW_TYPES = {
+    'tuple': lambda *values: values,
+    'namedtuple': WhatsNewRow,
+    'dict': lambda *values: dict(zip(WhatsNewRow._fields, values)),
+    '__slots__': SlotsRow,
+    'class': PlainRow,
+}
+
+
+def synthetic_values(count):
+    title, author = extract_whats_new_info(whats_new_pages(1)[0])
+    return [
+        (f'https://docs.python.org/3/whatsnew/{number}.html', title, author)
+        for number in range(count)
+    ]
+
+
+def measure(make_row, values):
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = [make_row(*row_values) for row_values in values]
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return size / len(values), elapsed / len(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    values = synthetic_values(args.rows)
+    print(f'{"строка":<12} {"байт/строку":>12} {"нс/строку":>10}')
+    for name, make_row in ROW_TYPES.items():
+        size, seconds = measure(make_row, values)
+        print(f'{name:<12} {size:>12.1f} {seconds * 1e9:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
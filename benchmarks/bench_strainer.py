@@ -0,0 +1,53 @@
+"""Разбор всего документа против разбора только нужной части.
+
+Запуск: python benchmarks/bench_strainer.py --pages 300
+
+Для каждой страницы сравниваются время построения дерева и пиковая
+память (tracemalloc) при полном разборе и с parse_only из constants.
+"""
+import argparse
+import time
+import tracemalloc
+
+from corpus import pep_pages, whats_new_pages
+
+from constants import PEP_PAGE_PARTS, WHATS_NEW_PAGE_PARTS
+from utils import make_soup
+
+
+def measure(pages, parse_only):
+    started = time.perf_counter()
+    for page in pages:
+        make_soup(page, parse_only=parse_only)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    make_soup(pages[0], parse_only=parse_only)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / len(pages), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=300)
+    args = parser.parse_args()
+
+    print(f'{"страницы":<12} {"разбор":<10} {"мс/стр":>8} {"пик, КБ":>9}')
+    for name, pages, parts in (
+        ('pep', pep_pages(args.pages), PEP_PAGE_PARTS),
+        ('whats-new', whats_new_pages(args.pages), WHATS_NEW_PAGE_PARTS),
+    ):
+        full_time, full_peak = measure(pages, None)
+        part_time, part_peak = measure(pages, parts)
+        for label, seconds, peak in (
+            ('полный', full_time, full_peak),
+            ('частичный', part_time, part_peak),
+        ):
+            print(f'{name:<12} {label:<10} {seconds * 1000:>8.2f}'
+                  f' {peak / 1024:>9.0f}')
+        print(f'{name:<12} ускорение {full_time / part_time:.1f}x, '
+              f'память {full_peak / part_peak:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
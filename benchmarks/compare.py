@@ -0,0 +1,46 @@
+"""Сравнение двух прогонов run.py, например до и после коммита.
+
+Запуск: python benchmarks/compare.py results/abc1234.json results/def5678.json
+"""
+import argparse
+import json
+
+KEY_FIELDS = ('mode', 'backend', 'cache')
+METRICS = ('wall_s', 'requests_per_s', 'parse_ms_per_page', 'peak_mb')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        report = json.load(file)
+    return report['commit'], {
+        tuple(result[field] for field in KEY_FIELDS): result
+        for result in report['results']
+    }
+
+
+def change(old, new):
+    if not old or new is None:
+        return ''
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    args = parser.parse_args()
+
+    old_commit, old_results = load(args.old)
+    new_commit, new_results = load(args.new)
+    print(f'{old_commit} -> {new_commit}')
+    print(f'{"случай":<36}' + ''.join(f'{metric:>20}' for metric in METRICS))
+    for key, new in new_results.items():
+        old = old_results.get(key, {})
+        print(f'{" ".join(key):<36}' + ''.join(
+            f'{new[metric] or 0:>11} {change(old.get(metric), new[metric]):>8}'
+            for metric in METRICS
+        ))
+
+
+if __name__ == '__main__':
+    main()
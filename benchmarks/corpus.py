@@ -0,0 +1,40 @@
+"""Корпус сохранённых страниц для бенчмарков.
+
+Страницы берутся из tests/fixture_data/site и раздуваются до размеров,
+близких к настоящим страницам peps.python.org.
+"""
+import re
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = BASE_DIR / 'src'
+SITE_DIR = BASE_DIR / 'tests' / 'fixture_data' / 'site'
+sys.path.append(str(SRC_DIR))
+
+ABSTRACT_PATTERN = re.compile(
+    r'<section id="abstract">.*?</section>', flags=re.DOTALL
+)
+# Средняя страница PEP весит порядка 50 КБ.
+DEFAULT_BODY_REPEAT = 60
+
+
+def inflate(html, repeat):
+    abstract = ABSTRACT_PATTERN.search(html).group()
+    return html.replace(abstract, abstract * repeat, 1)
+
+
+def pep_pages(count, repeat=DEFAULT_BODY_REPEAT):
+    pages = [
+        inflate(path.read_text(encoding='utf-8'), repeat)
+        for path in sorted(SITE_DIR.glob('pep-*/index.html'))
+    ]
+    return [pages[index % len(pages)] for index in range(count)]
+
+
+def whats_new_pages(count):
+    pages = [
+        path.read_text(encoding='utf-8')
+        for path in sorted(SITE_DIR.glob('3/whatsnew/[0-9]*.html'))
+    ]
+    return [pages[index % len(pages)] for index in range(count)]
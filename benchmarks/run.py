@@ -0,0 +1,238 @@
+"""Сквозной бенчмарк режимов парсера на офлайн-снимке сайтов.
+
+Запуск: python benchmarks/run.py --latency 0.02 --jitter 0.01
+
+Снимок из snapshot.py отдаётся локальным сервером с задержкой,
+адреса docs.python.org и peps.python.org в main подменяются адресом
+сервера. Для каждого режима и бэкенда разбора замеряются время,
+запросы в секунду, время разбора страницы и пиковая память.
+Результаты сохраняются в results/<коммит>.json, сравнить два прогона
+можно через compare.py.
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+import json
+from pathlib import Path
+import subprocess
+from tempfile import TemporaryDirectory
+import threading
+import time
+import tracemalloc
+
+from corpus import BASE_DIR
+from server import serve_snapshot
+from snapshot import build_snapshot
+
+import main
+from configs import configure_argument_parser, configure_session
+from constants import (
+    BS4_BACKEND,
+    LXML_BACKEND,
+    PEP_BULK_SOURCE,
+    PEP_PAGES_SOURCE
+)
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+PAGE_MODES = ('whats-new', 'pep')
+
+
+class TimedExtractor:
+    """Обёртка над функцией разбора, суммирующая время вызовов."""
+
+    def __init__(self, extract):
+        self.extract = extract
+        self.calls = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, html):
+        started = time.perf_counter()
+        try:
+            return self.extract(html)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.calls += 1
+                self.seconds += elapsed
+
+
+@contextmanager
+def timed_extractors():
+    """Подменяет функции разбора в main на замеряющие обёртки."""
+    originals = [
+        (extractors, dict(extractors))
+        for extractors in (
+            main.WHATS_NEW_EXTRACTORS, main.PEP_STATUS_EXTRACTORS
+        )
+    ]
+    timers = []
+    for extractors, _ in originals:
+        for backend, extract in extractors.items():
+            extractors[backend] = TimedExtractor(extract)
+            timers.append(extractors[backend])
+    try:
+        yield timers
+    finally:
+        for extractors, original in originals:
+            extractors.update(original)
+
+
+@contextmanager
+def patched_urls(base_url, downloads_dir):
+    names = {
+        'MAIN_PEP_URL': base_url,
+        'MAIN_DOC_URL': base_url + '3/',
+        'WHATS_NEW_URL': base_url + '3/whatsnew/',
+        'DOWNLOADS_URL': base_url + '3/download.html',
+        'BASE_DIR': downloads_dir,
+        'PEPS_JSON_FILE': downloads_dir / 'peps.json',
+    }
+    originals = {name: getattr(main, name) for name in names}
+    for name, value in names.items():
+        setattr(main, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(main, name, value)
+
+
+def run_mode(session, cli_args, counter):
+    mode_function = main.MODE_TO_FUNCTION[cli_args.mode]
+    counter.reset()
+    tracemalloc.start()
+    with timed_extractors() as timers:
+        started = time.perf_counter()
+        rows = mode_function(session, cli_args=cli_args)
+        wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    requests = counter.reset()
+    pages = sum(timer.calls for timer in timers)
+    return {
+        'wall_s': round(wall, 4),
+        'requests': requests,
+        'requests_per_s': round(requests / wall, 1) if wall else None,
+        'pages': pages,
+        'parse_ms_per_page': round(
+            sum(timer.seconds for timer in timers) / pages * 1000, 3
+        ) if pages else None,
+        'peak_mb': round(peak / 2 ** 20, 2),
+        'rows': len(rows) if rows is not None else None,
+    }
+
+
+def cases(modes, backends):
+    for mode in modes:
+        for backend in backends if mode in PAGE_MODES else (BS4_BACKEND,):
+            yield mode, backend
+
+
+def run_benchmarks(base_url, counter, args):
+    parser = configure_argument_parser(main.MODE_TO_FUNCTION.keys())
+    results = []
+    with TemporaryDirectory() as downloads_dir, \
+            patched_urls(base_url, Path(downloads_dir)):
+        for mode, backend in cases(args.modes, args.backends):
+            cli_args, = main.select_modes(parser.parse_args([
+                mode, '-b', backend, '-w', str(args.workers),
+                '--pep-source', args.pep_source
+            ]))
+            session = configure_session(cli_args, backend='memory')
+            for cache in ('cold', 'warm'):
+                result = {
+                    'mode': mode, 'backend': backend, 'cache': cache,
+                    **run_mode(session, cli_args, counter)
+                }
+                results.append(result)
+                print(format_result(result), flush=True)
+    return results
+
+
+def format_result(result):
+    return (
+        f'{result["mode"]:<16} {result["backend"]:<5} '
+        f'{result["cache"]:<5} '
+        f'{result["wall_s"]:>8.3f} с {result["requests"]:>5} запр. '
+        f'{result["requests_per_s"] or 0:>8.1f} запр/с '
+        f'{result["parse_ms_per_page"] or 0:>7.2f} мс/стр '
+        f'{result["peak_mb"]:>7.2f} МБ'
+    )
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return revision, dirty
+
+
+def save_results(results, settings, output=None):
+    revision, dirty = git_revision()
+    path = Path(output) if output else RESULTS_DIR / (
+        revision + ('-dirty' if dirty else '') + '.json'
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        'commit': revision,
+        'dirty': dirty,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'settings': settings,
+        'results': results,
+    }, ensure_ascii=False, indent=2), encoding='utf-8')
+    return path
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--modes', nargs='+', default=list(main.MODE_TO_FUNCTION)
+    )
+    parser.add_argument(
+        '--backends', nargs='+', default=[BS4_BACKEND, LXML_BACKEND]
+    )
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument(
+        '--pep-source', choices=(PEP_PAGES_SOURCE, PEP_BULK_SOURCE),
+        default=PEP_PAGES_SOURCE
+    )
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--peps', type=int, default=600)
+    parser.add_argument('--versions', type=int, default=12)
+    parser.add_argument('--archive-mb', type=int, default=8)
+    parser.add_argument(
+        '--snapshot', help='каталог с сохранёнными страницами'
+    )
+    parser.add_argument('--output', help='файл для результатов')
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as snapshot_dir:
+        snapshot = args.snapshot or build_snapshot(
+            snapshot_dir,
+            peps=args.peps,
+            versions=args.versions,
+            archive_size=args.archive_mb << 20
+        )
+        with serve_snapshot(
+            snapshot, latency=args.latency, jitter=args.jitter
+        ) as (base_url, counter):
+            results = run_benchmarks(base_url, counter, args)
+    settings = {
+        name: value for name, value in vars(args).items()
+        if name != 'output'
+    }
+    print(save_results(results, settings, args.output))
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,67 @@
+"""Локальная замена docs.python.org и peps.python.org с задержками."""
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import random
+import threading
+import time
+
+
+class LatencyHandler(SimpleHTTPRequestHandler):
+    """Отдаёт файлы снимка с задержкой latency ± jitter секунд
+    и считает обработанные запросы."""
+
+    def __init__(self, *args, latency, jitter, counter, **kwargs):
+        self.latency = latency
+        self.jitter = jitter
+        self.counter = counter
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_head(self):
+        self.counter.increment()
+        time.sleep(
+            max(0, self.latency + random.uniform(-self.jitter, self.jitter))
+        )
+        return super().send_head()
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def increment(self):
+        with self.lock:
+            self.value += 1
+
+    def reset(self):
+        with self.lock:
+            value, self.value = self.value, 0
+        return value
+
+
+@contextmanager
+def serve_snapshot(directory, latency=0.0, jitter=0.0):
+    """Запускает сервер и отдаёт пару (базовый url, счётчик запросов)."""
+    counter = Counter()
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', 0),
+        partial(
+            LatencyHandler,
+            directory=str(directory),
+            latency=latency,
+            jitter=jitter,
+            counter=counter
+        )
+    )
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}/', counter
+    finally:
+        server.shutdown()
+        server.server_close()
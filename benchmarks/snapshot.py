@@ -0,0 +1,148 @@
+"""Снимок страниц docs.python.org и peps.python.org для бенчмарков.
+
+Снимок собирается из страниц tests/fixture_data/site и масштабируется
+до размеров настоящих сайтов: общий список на сотни PEP, страница
+на каждый PEP, страницы «What's New» по версиям и архив документации.
+Вместо синтетического снимка можно передать каталог с сохранёнными
+настоящими страницами той же структуры.
+"""
+import json
+import os
+from pathlib import Path
+import re
+import shutil
+import zipfile
+
+from corpus import SITE_DIR, inflate
+
+# Пары (тип и статус в общем списке, статус на странице PEP).
+PEP_STATUSES = (
+    ('PA', 'Active'),
+    ('SF', 'Final'),
+    ('IA', 'Active'),
+    ('SR', 'Rejected'),
+    ('SD', 'Deferred'),
+    ('IW', 'Withdrawn'),
+    ('SS', 'Superseded'),
+    ('SF', 'Final'),
+    ('SP', 'Provisional'),
+    ('SA', 'Accepted'),
+    ('S', 'Draft'),
+    ('SR', 'April Fool!'),
+)
+ARCHIVE_NAME = 'python-3.12-docs-pdf-a4.zip'
+ARCHIVE_MEMBER_SIZE = 1024 * 1024
+PEP_ROW = (
+    '<tr class="row-even"><td><abbr title="{abbr}">{abbr}</abbr></td>'
+    '<td><a class="pep reference internal" href="pep-{number:04d}/" '
+    'title="PEP {number}">{number}</a></td>'
+    '<td><a class="pep reference internal" href="pep-{number:04d}/" '
+    'title="PEP {number}">PEP {number}</a></td>'
+    '<td>Author {number}</td></tr>'
+)
+VERSION_ITEM = (
+    '<li class="toctree-l1"><a class="reference internal" '
+    'href="{version}.html">What’s New In Python {version}</a></li>'
+)
+
+
+def read(path):
+    return (SITE_DIR / path).read_text(encoding='utf-8')
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+def build_pep_site(directory, peps):
+    index = read('index.html')
+    rows = '\n'.join(
+        PEP_ROW.format(
+            abbr=PEP_STATUSES[number % len(PEP_STATUSES)][0], number=number
+        )
+        for number in range(1, peps + 1)
+    )
+    write(
+        directory / 'index.html',
+        re.sub(
+            r'(<section id="numerical-index">.*?<tbody>).*?(</tbody>)',
+            lambda match: match.group(1) + rows + match.group(2),
+            index,
+            flags=re.DOTALL
+        )
+    )
+    write(
+        directory / 'api' / 'peps.json',
+        json.dumps({
+            str(number): {
+                'number': number,
+                'status': PEP_STATUSES[number % len(PEP_STATUSES)][1],
+            }
+            for number in range(1, peps + 1)
+        })
+    )
+    page = inflate(read('pep-0008/index.html'), repeat=60)
+    for number in range(1, peps + 1):
+        write(
+            directory / f'pep-{number:04d}' / 'index.html',
+            page.replace('PEP 8', f'PEP {number}').replace(
+                '>Active</abbr>',
+                '>{}</abbr>'.format(
+                    PEP_STATUSES[number % len(PEP_STATUSES)][1]
+                ),
+                1
+            )
+        )
+
+
+def build_docs_site(directory, versions):
+    shutil.copy(SITE_DIR / '3' / 'index.html', directory / '3')
+    shutil.copy(SITE_DIR / '3' / 'download.html', directory / '3')
+    version_names = [f'3.{minor}' for minor in range(versions, 0, -1)]
+    index = read('3/whatsnew/index.html')
+    write(
+        directory / '3' / 'whatsnew' / 'index.html',
+        re.sub(
+            r'(<div class="toctree-wrapper compound">\s*<ul>).*?'
+            r'(</ul>\s*</div>)',
+            lambda match: (
+                match.group(1)
+                + '\n'.join(
+                    VERSION_ITEM.format(version=version)
+                    for version in version_names
+                )
+                + match.group(2)
+            ),
+            index,
+            count=1,
+            flags=re.DOTALL
+        )
+    )
+    page = read('3/whatsnew/3.12.html')
+    for version in version_names:
+        write(
+            directory / '3' / 'whatsnew' / f'{version}.html',
+            page.replace('3.12', version).replace('3-12', version.replace(
+                '.', '-'
+            ))
+        )
+
+
+def build_archive(directory, archive_size):
+    archives_dir = directory / '3' / 'archives'
+    archives_dir.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(archives_dir / ARCHIVE_NAME, 'w') as archive:
+        for number in range(max(1, archive_size // ARCHIVE_MEMBER_SIZE)):
+            archive.writestr(
+                f'docs-{number}.pdf', os.urandom(ARCHIVE_MEMBER_SIZE)
+            )
+
+
+def build_snapshot(directory, peps=600, versions=12, archive_size=8 << 20):
+    directory = Path(directory)
+    (directory / '3').mkdir(parents=True, exist_ok=True)
+    build_pep_site(directory, peps)
+    build_docs_site(directory, versions)
+    build_archive(directory, archive_size)
+    return directory
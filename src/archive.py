@@ -0,0 +1,163 @@
+"""Архив ответов для записи и воспроизведения запусков без сети.
+
+Файл архива состоит из заголовка, записей и индекса:
+
+    MAGIC
+    запись: длина метаданных, длина тела (>II), метаданные в JSON,
+            тело, сжатое zlib
+    ...
+    индекс: {url: [смещение записи, длина метаданных, длина тела]},
+            JSON, сжатый zlib
+    хвост: смещение индекса, длина индекса, INDEX_MAGIC (>QQ8s)
+
+Индекс дописывается при закрытии архива. Если запись оборвалась
+раньше, индекс восстанавливается последовательным чтением записей.
+Архив читается через mmap: поиск по url — словарь, распаковывается
+только тело нужной записи.
+"""
+from contextlib import contextmanager
+import json
+import logging
+import mmap
+import struct
+import threading
+import zlib
+
+MAGIC = b'PEPARC1\n'
+INDEX_MAGIC = b'PEPARCIX'
+RECORD_HEADER = struct.Struct('>II')
+FOOTER = struct.Struct('>QQ8s')
+# Тело хранится распакованным по транспортной кодировке, поэтому
+# заголовки о ней при воспроизведении не нужны.
+SKIPPED_HEADERS = frozenset(
+    ('content-encoding', 'content-length', 'transfer-encoding')
+)
+RECORDED_LOG = 'Записано ответов в архив {path}: {count}'
+NOT_AN_ARCHIVE_EXCEPTION = 'Файл {path} не является архивом ответов'
+
+
+class ArchiveWriter:
+    """Дописывает ответы в архив; повторные ответы для того же url
+    пропускаются."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.index = {}
+        self.lock = threading.Lock()
+
+    def add(self, url, response):
+        meta = json.dumps({
+            'url': url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in SKIPPED_HEADERS
+            },
+        }, ensure_ascii=False).encode('utf-8')
+        body = zlib.compress(response.content)
+        with self.lock:
+            if url in self.index or self.file.closed:
+                return
+            offset = self.file.tell()
+            self.file.write(RECORD_HEADER.pack(len(meta), len(body)))
+            self.file.write(meta)
+            self.file.write(body)
+            self.index[url] = (offset, len(meta), len(body))
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            index = zlib.compress(json.dumps(self.index).encode('utf-8'))
+            index_offset = self.file.tell()
+            self.file.write(index)
+            self.file.write(FOOTER.pack(index_offset, len(index), INDEX_MAGIC))
+            self.file.close()
+
+
+class ArchiveReader:
+    """Отдаёт записанные ответы по url."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as archive_file:
+            self.data = mmap.mmap(
+                archive_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        if self.data[:len(MAGIC)] != MAGIC:
+            self.data.close()
+            raise ValueError(NOT_AN_ARCHIVE_EXCEPTION.format(path=path))
+        self.index = self.read_index()
+
+    def read_index(self):
+        if len(self.data) >= len(MAGIC) + FOOTER.size:
+            index_offset, index_length, magic = FOOTER.unpack_from(
+                self.data, len(self.data) - FOOTER.size
+            )
+            if magic == INDEX_MAGIC:
+                return {
+                    url: tuple(location)
+                    for url, location in json.loads(zlib.decompress(
+                        self.data[index_offset:index_offset + index_length]
+                    )).items()
+                }
+        return self.scan()
+
+    def scan(self):
+        """Восстанавливает индекс архива, запись которого оборвалась."""
+        index = {}
+        offset = len(MAGIC)
+        while offset + RECORD_HEADER.size <= len(self.data):
+            meta_length, body_length = RECORD_HEADER.unpack_from(
+                self.data, offset
+            )
+            meta_start = offset + RECORD_HEADER.size
+            end = meta_start + meta_length + body_length
+            if end > len(self.data):
+                break
+            try:
+                url = json.loads(
+                    self.data[meta_start:meta_start + meta_length]
+                )['url']
+            except (ValueError, KeyError, TypeError):
+                break
+            index.setdefault(url, (offset, meta_length, body_length))
+            offset = end
+        return index
+
+    def get(self, url):
+        """Возвращает (метаданные, тело) ответа или None."""
+        location = self.index.get(url)
+        if location is None:
+            return None
+        offset, meta_length, body_length = location
+        meta_start = offset + RECORD_HEADER.size
+        body_start = meta_start + meta_length
+        return (
+            json.loads(self.data[meta_start:body_start]),
+            zlib.decompress(self.data[body_start:body_start + body_length])
+        )
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        self.data.close()
+
+
+@contextmanager
+def recording(session):
+    """Закрывает архив записи сессии после запуска."""
+    try:
+        yield
+    finally:
+        recorder = getattr(session, 'recorder', None)
+        if recorder is not None:
+            recorder.close()
+            logging.info(RECORDED_LOG.format(
+                path=recorder.path, count=len(recorder.index)
+            ))
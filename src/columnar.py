@@ -0,0 +1,124 @@
+"""Запись результатов в колоночном виде.
+
+Если установлен pyarrow, результаты пишутся в Parquet. Иначе
+используется собственный компактный формат: заголовок со схемой
+в JSON, затем колонки одна за другой. Целые числа хранятся массивом
+int64, вещественные — float64, строки — массивом смещений и общим
+блоком UTF-8.
+"""
+from array import array
+from importlib.util import find_spec
+import json
+
+MAGIC = b'PEPCOL1\n'
+PARQUET_EXTENSION = 'parquet'
+TYPED_COLUMNS_EXTENSION = 'pepcol'
+
+INT_TYPE = 'int64'
+FLOAT_TYPE = 'float64'
+STRING_TYPE = 'string'
+ARRAY_TYPECODES = {INT_TYPE: 'q', FLOAT_TYPE: 'd'}
+COLUMN_TYPES = {int: INT_TYPE, float: FLOAT_TYPE}
+
+
+def infer_type(values):
+    if all(
+        isinstance(value, int) and not isinstance(value, bool)
+        for value in values
+    ):
+        return INT_TYPE
+    if all(isinstance(value, (int, float)) for value in values):
+        return FLOAT_TYPE
+    return STRING_TYPE
+
+
+def to_columns(rows, names):
+    """Колонки результата. Типы берутся из схемы заголовка,
+    если она есть, иначе определяются по значениям."""
+    columns = list(zip(*rows)) or [()] * len(names)
+    types = getattr(names, 'types', None)
+    if types is None:
+        types = [infer_type(values) for values in columns]
+    else:
+        types = [COLUMN_TYPES.get(value_type, STRING_TYPE)
+                 for value_type in types]
+    return {
+        name: (column_type, values)
+        for name, column_type, values in zip(names, types, columns)
+    }
+
+
+def get_extension():
+    if find_spec('pyarrow') is None:
+        return TYPED_COLUMNS_EXTENSION
+    return PARQUET_EXTENSION
+
+
+def write_parquet(path, columns):
+    import pyarrow
+    from pyarrow import parquet
+
+    parquet.write_table(
+        pyarrow.table({
+            name: pyarrow.array(
+                values if column_type != STRING_TYPE else map(str, values),
+                type=getattr(pyarrow, column_type)()
+            )
+            for name, (column_type, values) in columns.items()
+        }),
+        path
+    )
+
+
+def write_typed_columns(path, columns):
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(json.dumps({
+            'rows': len(next(iter(columns.values()))[1]) if columns else 0,
+            'columns': [
+                {'name': name, 'type': column_type}
+                for name, (column_type, _) in columns.items()
+            ]
+        }, ensure_ascii=False).encode('utf-8') + b'\n')
+        for column_type, values in columns.values():
+            if column_type in ARRAY_TYPECODES:
+                array(ARRAY_TYPECODES[column_type], values).tofile(file)
+                continue
+            encoded = [str(value).encode('utf-8') for value in values]
+            offsets = array('q', [0])
+            for value in encoded:
+                offsets.append(offsets[-1] + len(value))
+            offsets.tofile(file)
+            file.write(b''.join(encoded))
+
+
+def read_typed_columns(path):
+    """Читает файл собственного формата в словарь {колонка: список}."""
+    with open(path, 'rb') as file:
+        if file.readline() != MAGIC:
+            raise ValueError(path)
+        schema = json.loads(file.readline())
+        rows = schema['rows']
+        columns = {}
+        for column in schema['columns']:
+            if column['type'] in ARRAY_TYPECODES:
+                values = array(ARRAY_TYPECODES[column['type']])
+                values.fromfile(file, rows)
+                columns[column['name']] = values.tolist()
+                continue
+            offsets = array('q')
+            offsets.fromfile(file, rows + 1)
+            blob = file.read(offsets[-1])
+            columns[column['name']] = [
+                blob[start:end].decode('utf-8')
+                for start, end in zip(offsets, offsets[1:])
+            ]
+    return columns
+
+
+def write_columns(path, names, rows):
+    columns = to_columns(list(rows), names)
+    if path.suffix == '.' + PARQUET_EXTENSION:
+        write_parquet(path, columns)
+    else:
+        write_typed_columns(path, columns)
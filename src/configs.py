@@ -1,8 +1,49 @@
 import argparse
+from collections import Counter
 import logging
 from logging.handlers import RotatingFileHandler
 
 import constants
+from archive import ArchiveWriter
+from memo import EXTRACT_MAX_ENTRIES, SoupMemo
+from ratelimit import AdaptiveScheduler
+from retries import RetryPolicy
+
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            constants.NOT_POSITIVE_INT_ERROR.format(value=value)
+        )
+    return number
+
+
+def non_negative_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            constants.NEGATIVE_INT_ERROR.format(value=value)
+        )
+    return number
+
+
+def positive_float(value):
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(
+            constants.NOT_POSITIVE_NUMBER_ERROR.format(value=value)
+        )
+    return number
 
 
 def configure_argument_parser(available_modes):
@@ -11,6 +52,7 @@ def configure_argument_parser(available_modes):
     )
     parser.add_argument(
         'mode',
+        nargs='+',
         choices=available_modes,
         help=constants.MODE_ARGUMENT_HELP
     )
@@ -23,13 +65,174 @@ def configure_argument_parser(available_modes):
     parser.add_argument(
         '-o',
         '--output',
-        choices=(constants.PRETTY_OUTPUT, constants.FILE_OUTPUT),
+        choices=(
+            constants.PRETTY_OUTPUT,
+            constants.FILE_OUTPUT,
+            constants.JSONL_OUTPUT,
+            constants.COLUMNAR_OUTPUT,
+            constants.SQLITE_OUTPUT
+        ),
         help=constants.OUTPUT_ARGUMENT_HELP
     )
+    parser.add_argument(
+        '--index-expire-after',
+        type=positive_int,
+        default=constants.INDEX_EXPIRE_AFTER,
+        help=constants.INDEX_EXPIRE_AFTER_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--pages-expire-after',
+        type=positive_int,
+        default=constants.PAGES_EXPIRE_AFTER,
+        help=constants.PAGES_EXPIRE_AFTER_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help=constants.CACHE_STATS_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--cache-backend',
+        choices=(constants.SQLITE_CACHE, constants.SEGMENTS_CACHE),
+        default=constants.SQLITE_CACHE,
+        help=constants.CACHE_BACKEND_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--cache-max-mb',
+        type=positive_int,
+        default=constants.DEFAULT_CACHE_MAX_MB,
+        help=constants.CACHE_MAX_MB_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--cache-compact',
+        action='store_true',
+        help=constants.CACHE_COMPACT_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '-w',
+        '--workers',
+        type=positive_int,
+        default=constants.DEFAULT_WORKERS,
+        help=constants.WORKERS_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '-b',
+        '--backend',
+        choices=(constants.BS4_BACKEND, constants.LXML_BACKEND),
+        default=constants.BS4_BACKEND,
+        help=constants.BACKEND_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '-p',
+        '--parse-workers',
+        type=positive_int,
+        help=constants.PARSE_WORKERS_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '-i',
+        '--incremental',
+        action='store_true',
+        help=constants.INCREMENTAL_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--pep-table',
+        choices=(
+            constants.PEP_STATUSES_TABLE,
+            constants.PEP_TYPES_TABLE,
+            constants.PEP_MISMATCHES_TABLE
+        ),
+        default=constants.PEP_STATUSES_TABLE,
+        help=constants.PEP_TABLE_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--pep-source',
+        choices=(constants.PEP_PAGES_SOURCE, constants.PEP_BULK_SOURCE),
+        default=constants.PEP_PAGES_SOURCE,
+        help=constants.PEP_SOURCE_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '-a',
+        '--archives',
+        nargs='+',
+        metavar='PATTERN',
+        default=constants.DEFAULT_ARCHIVE_PATTERNS,
+        help=constants.ARCHIVES_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--segments',
+        type=positive_int,
+        default=constants.DEFAULT_SEGMENTS,
+        help=constants.SEGMENTS_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--bandwidth-limit',
+        type=positive_int,
+        help=constants.BANDWIDTH_LIMIT_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--rate-limit',
+        type=positive_float,
+        help=constants.RATE_LIMIT_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--retries',
+        type=non_negative_int,
+        default=constants.DEFAULT_RETRIES,
+        help=constants.RETRIES_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--retry-backoff',
+        type=positive_float,
+        default=constants.DEFAULT_RETRY_BACKOFF,
+        help=constants.RETRY_BACKOFF_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--timeout',
+        type=positive_float,
+        default=constants.DEFAULT_TIMEOUT,
+        help=constants.TIMEOUT_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help=constants.PROFILE_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--profile-json',
+        metavar='PATH',
+        help=constants.PROFILE_JSON_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--cprofile',
+        metavar='PATH',
+        help=constants.CPROFILE_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--metrics-file',
+        metavar='PATH',
+        help=constants.METRICS_FILE_ARGUMENT_HELP
+    )
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument(
+        '--record',
+        metavar='PATH',
+        help=constants.RECORD_ARGUMENT_HELP
+    )
+    archive_group.add_argument(
+        '--replay',
+        metavar='PATH',
+        help=constants.REPLAY_ARGUMENT_HELP
+    )
+    parser.add_argument(
+        '--watch',
+        type=positive_float,
+        metavar='SECONDS',
+        help=constants.WATCH_ARGUMENT_HELP
+    )
     return parser
 
 
-def configure_logging():
+def configure_logging(*extra_handlers):
     constants.LOG_DIR.mkdir(exist_ok=True)
     rotating_handler = RotatingFileHandler(
         constants.LOG_FILE, maxBytes=10 ** 6, backupCount=5
@@ -38,5 +241,105 @@ def configure_logging():
         datefmt=constants.DT_FORMAT,
         format=constants.LOG_FORMAT,
         level=logging.INFO,
-        handlers=(rotating_handler, logging.StreamHandler())
+        handlers=(
+            rotating_handler, logging.StreamHandler(), *extra_handlers
+        )
+    )
+
+
+def get_urls_expire_after(cli_args):
+    pages_expire_after = getattr(
+        cli_args, 'pages_expire_after', constants.PAGES_EXPIRE_AFTER
+    )
+    index_expire_after = getattr(
+        cli_args, 'index_expire_after', constants.INDEX_EXPIRE_AFTER
     )
+    # Шаблоны проверяются по порядку, поэтому частные идут первыми.
+    return {
+        constants.PEP_PAGES_CACHE_PATTERN: pages_expire_after,
+        constants.WHATS_NEW_PAGES_CACHE_PATTERN: pages_expire_after,
+        **dict.fromkeys(constants.INDEX_CACHE_PATTERNS, index_expire_after)
+    }
+
+
+def configure_session(cli_args, concurrent_modes=1, **session_kwargs):
+    import requests_cache
+
+    replay_path = getattr(cli_args, 'replay', None)
+    if replay_path is not None:
+        # Ответы из архива не должны попадать в кеш настоящих страниц.
+        session_kwargs.setdefault('backend', 'memory')
+    elif (
+        'backend' not in session_kwargs
+        and getattr(cli_args, 'cache_backend', None)
+        == constants.SEGMENTS_CACHE
+    ):
+        from segment_cache import SegmentCache
+
+        session_kwargs['backend'] = SegmentCache(
+            constants.CACHE_NAME,
+            max_bytes=getattr(
+                cli_args, 'cache_max_mb', constants.DEFAULT_CACHE_MAX_MB
+            ) * 1024 * 1024
+        )
+    session = requests_cache.CachedSession(
+        urls_expire_after=get_urls_expire_after(cli_args),
+        **session_kwargs
+    )
+    session.cache_stats = Counter()
+    # Одновременные запросы одного url из разных потоков и режимов.
+    session.in_flight = {}
+    session.soup_memo = SoupMemo()
+    session.extract_memo = SoupMemo(max_entries=EXTRACT_MAX_ENTRIES)
+    session.retry_policy = RetryPolicy(
+        retries=getattr(cli_args, 'retries', constants.DEFAULT_RETRIES),
+        backoff=getattr(
+            cli_args, 'retry_backoff', constants.DEFAULT_RETRY_BACKOFF
+        ),
+        timeout=getattr(cli_args, 'timeout', constants.DEFAULT_TIMEOUT),
+        failure_threshold=constants.CIRCUIT_FAILURE_THRESHOLD,
+        reset_after=constants.CIRCUIT_RESET_AFTER
+    )
+    # Пул соединений не меньше числа потоков всех режимов, иначе
+    # urllib3 будет закрывать лишние соединения после каждого запроса.
+    pool_size = cli_args.workers * concurrent_modes
+    session.scheduler = AdaptiveScheduler(
+        max_concurrency=pool_size,
+        rate=getattr(cli_args, 'rate_limit', None)
+    )
+    if replay_path is not None:
+        from replay import ReplayAdapter
+
+        adapter = ReplayAdapter(
+            replay_path, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+    else:
+        from scheduled_adapter import ScheduledAdapter
+
+        adapter = ScheduledAdapter(
+            session.scheduler,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size
+        )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    record_path = getattr(cli_args, 'record', None)
+    session.recorder = (
+        ArchiveWriter(record_path) if record_path is not None else None
+    )
+    if cli_args.clear_cache:
+        session.cache.clear()
+    return session
+
+
+def compact_cache(session):
+    """Удаляет просроченные ответы и освобождает место в файлах кеша.
+    Возвращает размер хранилища ответов до и после, байт, или None,
+    если хранилище не на диске."""
+    responses = session.cache.responses
+    if not hasattr(responses, 'vacuum'):
+        return None
+    size_before = responses.size()
+    session.cache.delete(expired=True)
+    responses.vacuum()
+    return size_before, responses.size()
@@ -17,10 +17,59 @@ BASE_DIR = Path(__file__).parent
 RESULTS_FILES_DIR = BASE_DIR / RESULTS_FILES_DIR_NAME
 DOWNLOADS_DOCKS_DIR = BASE_DIR / DOWNLOADS_DOCKS_DIR_NAME
 
+# Срок жизни ответов в кеше, секунды. Общие списки меняются часто,
+# отдельные страницы PEP и «What's New» — редко. Устаревшие ответы
+# с ETag/Last-Modified перепроверяются условными запросами.
+INDEX_EXPIRE_AFTER = 60 * 60
+PAGES_EXPIRE_AFTER = 7 * 24 * 60 * 60
+PEP_PAGES_CACHE_PATTERN = 'peps.python.org/pep-*'
+WHATS_NEW_PAGES_CACHE_PATTERN = 'docs.python.org/3/whatsnew/*'
+INDEX_CACHE_PATTERNS = ('peps.python.org/', 'docs.python.org/')
+
+CACHE_NAME = 'http_cache'
+SQLITE_CACHE = 'sqlite'
+SEGMENTS_CACHE = 'segments'
+DEFAULT_CACHE_MAX_MB = 256
+
+PEP_STATE_FILE_NAME = 'pep_state.sqlite3'
+PEP_STATE_FILE = BASE_DIR / PEP_STATE_FILE_NAME
+# Метаданные всех PEP одним файлом и его копия на случай недоступности
+# сайта.
+PEPS_JSON_PATH = 'api/peps.json'
+PEPS_JSON_FILE_NAME = 'peps.json'
+PEPS_JSON_FILE = BASE_DIR / PEPS_JSON_FILE_NAME
+
 CSV_FILE_NAME = '{parser_mode}_{datetime_now}.csv'
+JSONL_FILE_NAME = '{parser_mode}_{datetime_now}.jsonl'
+COLUMNAR_FILE_NAME = '{parser_mode}_{datetime_now}.{extension}'
+SQLITE_FILE_NAME = 'results.sqlite3'
 
 DATETIME_FORMAT = '%Y-%m-%d_%H-%M-%S'
 
+DEFAULT_WORKERS = 1
+
+# Шаблоны имён архивов из таблицы на странице загрузок.
+DEFAULT_ARCHIVE_PATTERNS = ('*pdf-a4.zip',)
+DEFAULT_SEGMENTS = 1
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 30
+# После стольких неудач подряд запросы к хосту приостанавливаются
+# на CIRCUIT_RESET_AFTER секунд.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_AFTER = 30
+
+BS4_BACKEND = 'bs4'
+LXML_BACKEND = 'lxml'
+
+PEP_STATUSES_TABLE = 'statuses'
+PEP_TYPES_TABLE = 'types'
+PEP_MISMATCHES_TABLE = 'mismatches'
+PEP_MODE = 'pep'
+
+PEP_PAGES_SOURCE = 'pages'
+PEP_BULK_SOURCE = 'bulk'
+
 EXPECTED_STATUS = {
     'A': ('Active', 'Accepted'),
     'D': ('Deferred',),
@@ -36,16 +85,108 @@ LINK_VERSION_STATUS_HEAD = ('Ссылка на документацию', 'Ве
 STATUS_NUMBERS_HEAD = ('Статус', 'Количество')
 TOTAL_NUMBERS_HEAD = 'Общее количество'
 LINK_TITLE_AUTHOR_HEAD = ('Ссылка на статью', 'Заголовок', 'Редактор, автор')
+MISMATCH_HEAD = ('Статус из списка', 'Статус на странице', 'Количество')
+TYPE_STATUS_HEAD = ('Тип', 'Статус', 'Количество')
+
+# Части страниц, которые строятся при разборе (аргументы SoupStrainer).
+WHATS_NEW_INDEX_PARTS = {'attrs': {'id': 'what-s-new-in-python'}}
+WHATS_NEW_PAGE_PARTS = {'name': ['h1', 'dl']}
+SIDEBAR_PARTS = {'name': 'div', 'attrs': {'class': 'sphinxsidebar'}}
+DOWNLOADS_TABLE_PARTS = {
+    'name': 'table', 'attrs': {'class': 'docutils align-default'}
+}
+PEP_INDEX_PARTS = {'attrs': {'id': 'pep-content'}}
+PEP_PAGE_PARTS = {
+    'name': 'dl', 'attrs': {'class': 'rfc2822 field-list simple'}
+}
 
 VERSION_STATUS_PATTERN = r'Python (?P<version>\d\.\d+) \((?P<status>.*)\)'
 
 # Argparse constants.
 PRETTY_OUTPUT = 'pretty'
 FILE_OUTPUT = 'file'
+JSONL_OUTPUT = 'jsonl'
+COLUMNAR_OUTPUT = 'columnar'
+SQLITE_OUTPUT = 'sqlite'
 
 MODE_ARGUMENT_HELP = 'Режимы работы парсера'
+# Выполнить все режимы за один запуск.
+ALL_MODES = 'all'
 CLEAR_CACHE_ARGUMENT_HELP = 'Очистка кеша'
 OUTPUT_ARGUMENT_HELP = 'Дополнительные способы вывода данных'
+WORKERS_ARGUMENT_HELP = 'Количество потоков для загрузки страниц'
+INDEX_EXPIRE_AFTER_ARGUMENT_HELP = (
+    'Срок жизни в кеше общих списков и оглавлений, секунды'
+)
+PAGES_EXPIRE_AFTER_ARGUMENT_HELP = (
+    'Срок жизни в кеше отдельных страниц PEP и «What\'s New», секунды'
+)
+CACHE_BACKEND_ARGUMENT_HELP = (
+    'Хранилище кеша: база SQLite или сжатый файл сегмента '
+    'с вытеснением давно не использованных ответов'
+)
+CACHE_MAX_MB_ARGUMENT_HELP = (
+    'Наибольший размер сжатых ответов в хранилище segments, МиБ'
+)
+CACHE_COMPACT_ARGUMENT_HELP = (
+    'Перед запуском удалить из кеша просроченные ответы '
+    'и освободить занятое ими место'
+)
+CACHE_STATS_ARGUMENT_HELP = 'Вывести статистику работы кеша'
+INCREMENTAL_ARGUMENT_HELP = (
+    'Загружать только страницы PEP, строка которых в общем списке '
+    'изменилась или ответ в кеше устарел'
+)
+PEP_TABLE_ARGUMENT_HELP = (
+    'Таблица режима pep: число PEP по статусам, по типам и статусам '
+    'или по парам несовпадающих статусов'
+)
+PEP_SOURCE_ARGUMENT_HELP = (
+    'Откуда режим pep берёт статусы: со страниц PEP или из общего файла '
+    'метаданных api/peps.json; страницы загружаются только для PEP, '
+    'которых нет в метаданных или статус которых не согласуется со списком'
+)
+ARCHIVES_ARGUMENT_HELP = (
+    'Шаблоны имён архивов для загрузки, например *.zip *.epub'
+)
+SEGMENTS_ARGUMENT_HELP = (
+    'Наибольшее число параллельных запросов на один большой архив'
+)
+BANDWIDTH_LIMIT_ARGUMENT_HELP = 'Общее ограничение скорости загрузки, байт/с'
+BACKEND_ARGUMENT_HELP = 'Способ извлечения данных со страниц'
+PARSE_WORKERS_ARGUMENT_HELP = (
+    'Количество процессов для разбора страниц '
+    '(по умолчанию разбор выполняется в потоках загрузки)'
+)
+RATE_LIMIT_ARGUMENT_HELP = 'Максимум запросов в секунду к одному хосту'
+RETRIES_ARGUMENT_HELP = (
+    'Сколько раз повторять запрос при ошибке соединения, таймауте '
+    'или ответе 429/5xx'
+)
+RETRY_BACKOFF_ARGUMENT_HELP = (
+    'Начальная пауза перед повтором, секунды; удваивается с каждой попыткой'
+)
+TIMEOUT_ARGUMENT_HELP = 'Таймаут запроса страницы, секунды'
+PROFILE_ARGUMENT_HELP = 'Вывести время работы этапов парсера'
+PROFILE_JSON_ARGUMENT_HELP = 'Сохранить время работы этапов в JSON-файл'
+CPROFILE_ARGUMENT_HELP = 'Сохранить статистику cProfile режима в файл'
+WATCH_ARGUMENT_HELP = (
+    'Перезапускать режим каждые SECONDS секунд в одном процессе '
+    'и выводить результаты, только если они изменились'
+)
+METRICS_FILE_ARGUMENT_HELP = (
+    'Записать метрики запуска в файл для textfile collector Prometheus'
+)
+RECORD_ARGUMENT_HELP = (
+    'Записать все загруженные страницы в архив PATH для запуска без сети'
+)
+REPLAY_ARGUMENT_HELP = (
+    'Отвечать на все запросы из архива PATH, записанного с --record, '
+    'не обращаясь к сети'
+)
+NOT_POSITIVE_NUMBER_ERROR = 'Ожидается число больше нуля: {value}'
+NOT_POSITIVE_INT_ERROR = 'Ожидается целое число больше нуля: {value}'
+NEGATIVE_INT_ERROR = 'Ожидается целое неотрицательное число: {value}'
 ARGPARSE_DESCRIPTION = 'Парсер документации Python'
 
 # Logger constants.
@@ -0,0 +1,282 @@
+"""Потоковая загрузка файлов с докачкой.
+
+Тело ответа пишется на диск частями во временный файл рядом
+с итоговым и не проходит через кеш запросов (requests_cache читает
+тело ответа целиком даже для некешируемых запросов), поэтому расход
+памяти не зависит от размера архива. Прерванная загрузка продолжается
+с места обрыва запросом с заголовком Range; если сервер не может
+отдать продолжение (416), файл загружается заново. Загрузка
+несколькими запросами пишет в заранее выделенный файл со своим
+суффиксом: его размер ничего не говорит о загруженных данных, поэтому
+он не продолжается, а при ошибке удаляется.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import time
+import zipfile
+
+from exceptions import DownloadIntegrityException
+from ratelimit import BandwidthLimiter
+
+CHUNK_SIZE = 64 * 1024
+MIN_SEGMENT_SIZE = 1024 * 1024
+PART_SUFFIX = '.part'
+SEGMENTS_SUFFIX = '.segments'
+ETAG_SUFFIX = '.etag'
+RANGE_NOT_SATISFIABLE = 416
+
+DOWNLOAD_SKIPPED_LOG = 'Архив не изменился, загрузка пропущена: {path}'
+DOWNLOAD_RESUMED_LOG = 'Загрузка {path} продолжена с {offset} байт'
+REQUEST_EXCEPTION = (
+    'Возникла ошибка при '
+    'загрузке файла {url}: {error}'
+)
+SIZE_MISMATCH_EXCEPTION = (
+    'Размер файла {path} ({size} байт) '
+    'не совпадает с ожидаемым ({expected} байт)'
+)
+RANGE_NOT_SUPPORTED_EXCEPTION = (
+    'Сервер не вернул часть файла {url} по запросу Range'
+)
+BROKEN_ZIP_EXCEPTION = 'Архив {path} повреждён: {member}'
+
+
+def uncached(session):
+    """Сессия без кеша, которая использует заголовки и пул
+    соединений session."""
+    from requests import Session
+
+    plain_session = Session()
+    plain_session.headers = session.headers
+    plain_session.adapters = session.adapters
+    return plain_session
+
+
+def read_etag(path):
+    etag_path = path.with_name(path.name + ETAG_SUFFIX)
+    if not etag_path.exists():
+        return None
+    return etag_path.read_text(encoding='utf-8')
+
+
+def write_etag(path, etag):
+    etag_path = path.with_name(path.name + ETAG_SUFFIX)
+    if etag is None:
+        etag_path.unlink(missing_ok=True)
+    else:
+        etag_path.write_text(etag, encoding='utf-8')
+
+
+def get_remote_info(session, url):
+    """Возвращает размер, ETag и поддержку Range по ответу на HEAD."""
+    headers = session.head(url, allow_redirects=True).headers
+    size = headers.get('Content-Length')
+    return (
+        int(size) if size is not None else None,
+        headers.get('ETag'),
+        headers.get('Accept-Ranges') == 'bytes'
+    )
+
+
+def is_up_to_date(path, size, etag):
+    if not path.exists() or size is None:
+        return False
+    if path.stat().st_size != size:
+        return False
+    return etag is None or read_etag(path) == etag
+
+
+def verify(path, size, is_zip):
+    if size is not None and path.stat().st_size != size:
+        raise DownloadIntegrityException(
+            SIZE_MISMATCH_EXCEPTION.format(
+                path=path, size=path.stat().st_size, expected=size
+            )
+        )
+    if is_zip:
+        try:
+            with zipfile.ZipFile(path) as archive:
+                broken_member = archive.testzip()
+        except zipfile.BadZipFile as error:
+            raise DownloadIntegrityException(
+                BROKEN_ZIP_EXCEPTION.format(path=path, member=error)
+            )
+        if broken_member is not None:
+            raise DownloadIntegrityException(
+                BROKEN_ZIP_EXCEPTION.format(path=path, member=broken_member)
+            )
+
+
+def make_progress(path, size, initial=0):
+    from tqdm import tqdm
+
+    return tqdm(
+        desc=path.name,
+        total=size,
+        initial=initial,
+        unit='B',
+        unit_scale=True,
+        unit_divisor=1024
+    )
+
+
+def copy_stream(response, file, progress, limiter=None):
+    for chunk in response.iter_content(CHUNK_SIZE):
+        if limiter is not None:
+            time.sleep(limiter.reserve(len(chunk)))
+        file.write(chunk)
+        progress.update(len(chunk))
+
+
+def stream_to_file(
+        session, url, part_path, size, etag, accept_ranges, limiter=None
+):
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    if size is not None and offset > size:
+        part_path.unlink()
+        offset = 0
+    headers = {}
+    if offset and accept_ranges:
+        headers['Range'] = f'bytes={offset}-'
+        if etag is not None:
+            # Если файл на сервере изменился, вернётся весь файл целиком.
+            headers['If-Range'] = etag
+    response = session.get(url, headers=headers, stream=True)
+    if offset and response.status_code == RANGE_NOT_SATISFIABLE:
+        # По одному размеру части нельзя понять, что в ней записано:
+        # загрузка начинается заново.
+        response.close()
+        part_path.unlink()
+        return stream_to_file(
+            session, url, part_path, size, etag, accept_ranges, limiter
+        )
+    with response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            offset = 0
+        elif offset:
+            logging.info(
+                DOWNLOAD_RESUMED_LOG.format(path=part_path, offset=offset)
+            )
+        with open(part_path, 'ab' if offset else 'wb') as file, \
+                make_progress(part_path, size, offset) as progress:
+            copy_stream(response, file, progress, limiter)
+
+
+def download_segment(session, url, part_path, start, end, progress, limiter):
+    with session.get(
+        url, headers={'Range': f'bytes={start}-{end}'}, stream=True
+    ) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise DownloadIntegrityException(
+                RANGE_NOT_SUPPORTED_EXCEPTION.format(url=url)
+            )
+        with open(part_path, 'r+b') as file:
+            file.seek(start)
+            copy_stream(response, file, progress, limiter)
+
+
+def stream_segments(session, url, part_path, size, segments, limiter=None):
+    """Загружает файл несколькими параллельными запросами с Range,
+    каждый из которых пишет в свою часть заранее выделенного файла."""
+    with open(part_path, 'wb') as file:
+        file.truncate(size)
+    bounds = [size * number // segments for number in range(segments + 1)]
+    try:
+        with make_progress(part_path, size) as progress, \
+                ThreadPoolExecutor(max_workers=segments) as executor:
+            for future in [
+                executor.submit(
+                    download_segment,
+                    session,
+                    url,
+                    part_path,
+                    start,
+                    end - 1,
+                    progress,
+                    limiter
+                )
+                for start, end in zip(bounds, bounds[1:])
+            ]:
+                future.result()
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+
+
+def count_segments(size, accept_ranges, segments):
+    if not accept_ranges or size is None:
+        return 1
+    return max(1, min(segments, size // MIN_SEGMENT_SIZE))
+
+
+def download_file(session, url, path, segments=1, limiter=None):
+    """Скачивает url в path и возвращает True, если файл был загружен,
+    или False, если на диске уже лежит актуальная копия.
+
+    Большие файлы можно загружать частями: segments — наибольшее
+    число параллельных запросов с Range на один файл. limiter
+    ограничивает общую скорость загрузки.
+    """
+    from requests import RequestException
+
+    part_path = path.with_name(path.name + PART_SUFFIX)
+    session = uncached(session)
+    try:
+        size, etag, accept_ranges = get_remote_info(session, url)
+        if is_up_to_date(path, size, etag):
+            logging.info(DOWNLOAD_SKIPPED_LOG.format(path=path))
+            return False
+        segments = count_segments(size, accept_ranges, segments)
+        if segments > 1:
+            part_path = path.with_name(path.name + SEGMENTS_SUFFIX)
+            stream_segments(session, url, part_path, size, segments, limiter)
+        else:
+            stream_to_file(
+                session, url, part_path, size, etag, accept_ranges, limiter
+            )
+    except RequestException as error:
+        raise ConnectionError(
+            REQUEST_EXCEPTION.format(url=url, error=error)
+        )
+    try:
+        verify(part_path, size, is_zip=path.suffix == '.zip')
+    except DownloadIntegrityException:
+        part_path.unlink()
+        raise
+    os.replace(part_path, path)
+    write_etag(path, etag)
+    return True
+
+
+def try_download_file(session, url, path, segments, limiter):
+    try:
+        return download_file(session, url, path, segments, limiter)
+    except (ConnectionError, DownloadIntegrityException) as error:
+        logging.error(error)
+        return None
+
+
+def download_files(
+        session, urls_to_paths, workers=1, segments=1, bandwidth_limit=None
+):
+    """Скачивает несколько файлов параллельно.
+
+    Возвращает пары (url, результат download_file); если файл
+    загрузить не удалось, результат равен None.
+    """
+    limiter = (
+        BandwidthLimiter(bandwidth_limit) if bandwidth_limit else None
+    )
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(zip(
+            urls_to_paths,
+            executor.map(
+                lambda url: try_download_file(
+                    session, url, urls_to_paths[url], segments, limiter
+                ),
+                urls_to_paths
+            )
+        ))
@@ -0,0 +1,106 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+import hashlib
+
+from constants import DEFAULT_WORKERS
+from utils import get_response
+
+MISSING = object()
+
+
+def extractor_key(extract):
+    """Ключ извлечения, одинаковый для равных partial: режимы
+    создают их заново при каждом запуске."""
+    if isinstance(extract, partial):
+        return (
+            extractor_key(extract.func),
+            tuple(map(extractor_key, extract.args)),
+            tuple(sorted(extract.keywords.items()))
+        )
+    return extract
+
+
+def extract_page(session, extract, url, response, parse_pool):
+    text = response.text
+    extract_memo = getattr(session, 'extract_memo', None)
+    if extract_memo is None:
+        if parse_pool is None:
+            return extract(text)
+        return parse_pool.submit(extract, text)
+    key = (
+        url,
+        extractor_key(extract),
+        hashlib.sha1(response.content).hexdigest()
+    )
+    if parse_pool is None:
+        return extract_memo.get(key, 0, partial(extract, text))
+    result = extract_memo.lookup(key, MISSING)
+    if result is not MISSING:
+        return result
+    future = parse_pool.submit(extract, text)
+
+    def remember(done):
+        if not done.cancelled() and done.exception() is None:
+            extract_memo.put(key, done.result(), 0)
+
+    future.add_done_callback(remember)
+    return future
+
+
+def fetch_and_extract(session, extract, url, parse_pool=None):
+    """Загружает страницу и применяет к ней extract.
+
+    Если у сессии есть extract_memo, результат берётся из него
+    по url, extract и хешу содержимого: неизменившаяся страница
+    повторно не разбирается, в том числе в режиме наблюдения.
+    """
+    try:
+        response = get_response(session, url)
+    except ConnectionError:
+        return url, None
+    # Поток сразу возвращается к загрузкам, а разбор страницы
+    # в пуле процессов продолжается.
+    return url, extract_page(session, extract, url, response, parse_pool)
+
+
+def crawl_threads(session, urls, extract, workers, parse_pool):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for url, result in executor.map(
+            partial(
+                fetch_and_extract,
+                session,
+                extract,
+                parse_pool=parse_pool
+            ),
+            urls
+        ):
+            if isinstance(result, Future):
+                result = result.result()
+            yield url, result
+
+
+def crawl(session, urls, extract, cli_args=None):
+    """Загружает страницы в потоках и применяет к ним extract.
+
+    extract получает текст страницы. Если задан --parse-workers,
+    разбор выполняется в пуле процессов, а потоки заняты только
+    загрузкой. Пары (url, результат) отдаются в порядке urls,
+    независимо от того, в каком порядке завершились загрузки.
+    Если страницу не удалось загрузить, вместо результата
+    возвращается None.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    parse_workers = getattr(cli_args, 'parse_workers', None)
+    with (
+        ProcessPoolExecutor(max_workers=parse_workers)
+        if parse_workers else nullcontext()
+    ) as parse_pool:
+        yield from crawl_threads(
+            session,
+            urls,
+            extract,
+            getattr(cli_args, 'workers', DEFAULT_WORKERS),
+            parse_pool
+        )
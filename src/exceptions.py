@@ -1,2 +1,6 @@
 class ParserFindTagException(Exception):
     """Вызывается, когда парсер не может найти тег."""
+
+
+class DownloadIntegrityException(Exception):
+    """Вызывается, когда загруженный файл повреждён или неполон."""
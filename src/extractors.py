@@ -0,0 +1,66 @@
+"""Извлечение данных из HTML-страниц.
+
+Функции принимают текст страницы и возвращают только извлечённые
+значения, поэтому их можно выполнять в отдельных процессах: между
+процессами передаются строки, а не деревья BeautifulSoup.
+Из каждой страницы строится только нужная часть дерева.
+
+Для каждой страницы есть две реализации: эталонная на BeautifulSoup
+и быстрая на lxml.html с XPath. Результаты у них совпадают.
+"""
+from constants import (
+    BS4_BACKEND,
+    LXML_BACKEND,
+    PEP_PAGE_PARTS,
+    WHATS_NEW_PAGE_PARTS
+)
+from utils import fingerprint, find_node, find_tag, make_soup, make_tree
+
+PEP_STATUS_XPATH = (
+    '//dl[@class="rfc2822 field-list simple"]'
+    '//text()[. = "Status"]/following::abbr[1]'
+)
+
+
+def extract_whats_new_info(html):
+    soup = make_soup(html, parse_only=WHATS_NEW_PAGE_PARTS)
+    return (
+        find_tag(soup, 'h1').text,
+        find_tag(soup, 'dl').text.replace('\n', ' ')
+    )
+
+
+def extract_pep_status(html):
+    return find_tag(
+        soup=make_soup(html, parse_only=PEP_PAGE_PARTS),
+        tag='dl',
+        attrs={'class': 'rfc2822 field-list simple'}
+    ).find(
+        string='Status'
+    ).find_next('abbr').text
+
+
+def lxml_extract_whats_new_info(html):
+    tree = make_tree(html)
+    return (
+        find_node(tree, '//h1').text_content(),
+        find_node(tree, '//dl').text_content().replace('\n', ' ')
+    )
+
+
+def lxml_extract_pep_status(html):
+    return find_node(make_tree(html), PEP_STATUS_XPATH).text_content()
+
+
+def extract_with_fingerprint(extract, html):
+    return extract(html), fingerprint(html)
+
+
+WHATS_NEW_EXTRACTORS = {
+    BS4_BACKEND: extract_whats_new_info,
+    LXML_BACKEND: lxml_extract_whats_new_info,
+}
+PEP_STATUS_EXTRACTORS = {
+    BS4_BACKEND: extract_pep_status,
+    LXML_BACKEND: lxml_extract_pep_status,
+}
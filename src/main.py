@@ -1,28 +1,83 @@
-from collections import defaultdict
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from functools import partial
 import logging
 import re
+import time
 from urllib.parse import urljoin
 
-import requests_cache
-from tqdm import tqdm
-
 from constants import (
+    ALL_MODES,
     BASE_DIR,
     WHATS_NEW_URL,
-    LINK_TITLE_AUTHOR_HEAD,
     MAIN_DOC_URL,
-    LINK_VERSION_STATUS_HEAD,
     VERSION_STATUS_PATTERN,
     DOWNLOADS_URL,
     MAIN_PEP_URL,
-    EXPECTED_STATUS,
-    STATUS_NUMBERS_HEAD,
-    TOTAL_NUMBERS_HEAD,
-    DOWNLOADS_DOCKS_DIR_NAME
+    PEP_STATUSES_TABLE,
+    PEP_TYPES_TABLE,
+    PEP_MISMATCHES_TABLE,
+    PEP_BULK_SOURCE,
+    PEP_PAGES_SOURCE,
+    PEPS_JSON_FILE,
+    PEPS_JSON_PATH,
+    DOWNLOADS_DOCKS_DIR_NAME,
+    WHATS_NEW_INDEX_PARTS,
+    SIDEBAR_PARTS,
+    DOWNLOADS_TABLE_PARTS,
+    PEP_INDEX_PARTS,
+    BS4_BACKEND,
+    PEP_STATE_FILE,
+    DEFAULT_ARCHIVE_PATTERNS,
+    DEFAULT_SEGMENTS,
+    DEFAULT_WORKERS
+)
+from archive import recording
+from configs import (
+    compact_cache,
+    configure_argument_parser,
+    configure_logging,
+    configure_session
 )
-from configs import configure_argument_parser, configure_logging
 from outputs import control_output
-from utils import get_response, find_tag, get_soup
+from metrics import MetricsHandler, write_metrics
+from profiling import cprofile_to, profiler
+from downloads import download_files
+from engines import crawl
+from extractors import (
+    PEP_STATUS_EXTRACTORS,
+    WHATS_NEW_EXTRACTORS,
+    extract_with_fingerprint
+)
+from pep_metadata import load_pep_statuses, split_by_bulk_statuses
+from pep_table import (
+    make_pep_table,
+    mismatch_rows,
+    missing_links,
+    reconcile,
+    select_links,
+    status_rows,
+    type_status_rows
+)
+from rows import (
+    VERSION_SCHEMA,
+    WHATS_NEW_SCHEMA,
+    VersionRow,
+    WhatsNewRow
+)
+from state import load_pep_state, save_pep_state
+from utils import (
+    rows_list,
+    CACHE_HIT,
+    CACHE_MISS,
+    CACHE_REVALIDATED,
+    CACHE_SHARED,
+    find_tag,
+    fingerprint,
+    get_soup,
+    is_cache_fresh
+)
 from exceptions import ParserFindTagException
 
 
@@ -41,6 +96,36 @@ EMPTY_TYPE_STATUS_COLUMN_LOG = (
     'PEP без типа и статуса: {data}'
 )
 BAD_LINKS_LOG = '{data}'
+CACHE_COMPACT_LOG = 'Кеш сжат: {before} → {after} байт'
+CACHE_STATS_LOG = (
+    'Кеш: попаданий {hit}, промахов {miss}, '
+    'перепроверено условными запросами {revalidated}; '
+    'разобранных страниц взято из памяти {memo_hits} из {memo_total}'
+)
+PROFILE_LOG = 'Время работы этапов:\n{table}'
+PROFILE_JSON_LOG = 'Время работы этапов сохранено: {path}'
+WATCH_RUN_LOG = 'Запуск режимов в режиме наблюдения: {modes}'
+WATCH_UNCHANGED_LOG = (
+    'Результаты режима {mode} не изменились с прошлого запуска.'
+)
+MODE_ERROR_LOG = 'Режим {mode} завершился с ошибкой: {error}'
+WATCH_STOPPED_LOG = 'Наблюдение остановлено.'
+RETRIES_LOG = (
+    'Повторено запросов: {retries} для {urls} ссылок; '
+    'не загружено после повторов: {failed}'
+)
+THROUGHPUT_LOG = (
+    'Хост {host}: {requests} запросов за {seconds} с '
+    '({requests_per_second} в секунду); одновременных запросов '
+    '{concurrency}{rate}, замедлений {slowdowns}'
+)
+THROUGHPUT_RATE_LOG = ', частота {rate} в секунду'
+BULK_STATUSES_LOG = (
+    'Статусов PEP из метаданных: {bulk}; загружается страниц: {pages}'
+)
+INCREMENTAL_LOG = (
+    'Загружено страниц PEP: {fetched}; взято из состояния: {stored}'
+)
 
 FIND_TAG_EXCEPTION = 'Ничего не нашлось'
 
@@ -49,46 +134,56 @@ MISMATCHED_STATUSES = (
     'Статус на странице {link}: {status_from_pep_page}'
 )
 BAD_LINK = 'Сбой при попытке пройти по ссылке: {link}'
+ARCHIVES_NOT_FOUND = 'Не найдены архивы по шаблонам {patterns}'
+
 
+@rows_list
+def whats_new(session, cli_args=None):
+    from tqdm import tqdm
 
-def whats_new(session):
-    results = [LINK_TITLE_AUTHOR_HEAD]
+    yield WHATS_NEW_SCHEMA
     bad_links = []
-    for a_tag in tqdm(
-        get_soup(session, WHATS_NEW_URL).select(
+    version_links = [
+        urljoin(WHATS_NEW_URL, a_tag['href'])
+        for a_tag in get_soup(
+            session, WHATS_NEW_URL, parse_only=WHATS_NEW_INDEX_PARTS
+        ).select(
             '#what-s-new-in-python '
             'div.toctree-wrapper li.toctree-l1 > a'
         )
+        if re.match(r'\d\.\d{,2}\.html', a_tag['href'])
+    ]
+    for version_link, info in tqdm(
+        crawl(
+            session,
+            version_links,
+            WHATS_NEW_EXTRACTORS[
+                getattr(cli_args, 'backend', BS4_BACKEND)
+            ],
+            cli_args
+        ),
+        total=len(version_links)
     ):
-        href = a_tag['href']
-        if not re.match(r'\d\.\d{,2}\.html', href):
-            continue
-        version_link = urljoin(WHATS_NEW_URL, href)
-        try:
-            soup = get_soup(session, version_link)
-        except ConnectionError:
+        if info is None:
             bad_links.append(
                 BAD_LINK.format(
                     link=version_link
                 )
             )
             continue
-        results.append(
-            (
-                version_link,
-                find_tag(soup, 'h1').text,
-                find_tag(soup, 'dl').text.replace('\n', ' ')
-            )
-        )
+        yield WhatsNewRow(version_link, *info)
     if bad_links:
-        logging.info(BAD_LINKS_LOG.format(data=bad_links))
-    return results
+        logging.info(
+            BAD_LINKS_LOG.format(data=bad_links),
+            extra={'metrics': {'bad_links': len(bad_links)}}
+        )
 
 
-def latest_versions(session):
-    results = [LINK_VERSION_STATUS_HEAD]
+@rows_list
+def latest_versions(session, cli_args=None):
+    yield VERSION_SCHEMA
     for a_tag in get_soup(
-            session, MAIN_DOC_URL
+            session, MAIN_DOC_URL, parse_only=SIDEBAR_PARTS
     ).select('div.sphinxsidebar li > a'):
         link = a_tag['href']
         if not re.match(r'.*\d\.\d{,2}/$', link):
@@ -98,47 +193,69 @@ def latest_versions(session):
             version, status = get_info.groups()
         else:
             version, status = a_tag.text, ''
-        results.append(
-            (link, version, status)
-        )
-    return results
+        yield VersionRow(link, version, status)
 
 
-def download(session):
-    link_to_pdf = urljoin(
-        DOWNLOADS_URL,
-        get_soup(session, DOWNLOADS_URL).select_one(
-            'table.docutils '
-            'a[href$="pdf-a4.zip"]'
-        )['href']
-    )
-    filename = link_to_pdf.split('/')[-1]
+def download(session, cli_args=None):
+    patterns = getattr(cli_args, 'archives', DEFAULT_ARCHIVE_PATTERNS)
+    archive_links = list(dict.fromkeys(
+        urljoin(DOWNLOADS_URL, a_tag['href'])
+        for a_tag in get_soup(
+            session, DOWNLOADS_URL, parse_only=DOWNLOADS_TABLE_PARTS
+        ).select('table.docutils a[href]')
+        if any(
+            fnmatch(a_tag['href'].split('/')[-1], pattern)
+            for pattern in patterns
+        )
+    ))
+    if not archive_links:
+        raise ParserFindTagException(
+            ARCHIVES_NOT_FOUND.format(patterns=patterns)
+        )
     # DOWNLOADS_DIR.mkdir(exist_ok=True)
     downloads_dir = BASE_DIR / DOWNLOADS_DOCKS_DIR_NAME
     downloads_dir.mkdir(exist_ok=True)
-    archive_path = downloads_dir / filename
-
-    with open(archive_path, 'wb') as file:
-        file.write(get_response(session, link_to_pdf).content)
 
-    logging.info(
-        DOWNLOADS_SUCCESS_LOG.format(
-            archive_path=archive_path
+    bad_links = []
+    for link, downloaded in download_files(
+        session,
+        {link: downloads_dir / link.split('/')[-1] for link in archive_links},
+        workers=getattr(cli_args, 'workers', DEFAULT_WORKERS),
+        segments=getattr(cli_args, 'segments', DEFAULT_SEGMENTS),
+        bandwidth_limit=getattr(cli_args, 'bandwidth_limit', None)
+    ):
+        if downloaded is None:
+            bad_links.append(BAD_LINK.format(link=link))
+        elif downloaded:
+            archive_path = downloads_dir / link.split('/')[-1]
+            logging.info(
+                DOWNLOADS_SUCCESS_LOG.format(
+                    archive_path=archive_path
+                ),
+                extra={'metrics': {
+                    'archives_downloaded': 1,
+                    'bytes_downloaded': archive_path.stat().st_size
+                }}
+            )
+    if bad_links:
+        logging.info(
+            BAD_LINKS_LOG.format(data=bad_links),
+            extra={'metrics': {'bad_links': len(bad_links)}}
         )
-    )
 
 
-def pep(session):
-    statuses_nums = defaultdict(int)
-    mismatched_statuses = []
+def get_pep_list(session):
+    """Возвращает строки общего списка PEP в виде кортежей
+    (ссылка, статус из списка, отпечаток строки, тип) и ссылки на PEP
+    без типа и статуса."""
+    pep_list = []
     empty_type_and_status_columns = []
-    bad_links = []
-    for row in tqdm(
-        get_soup(session, MAIN_PEP_URL).select(
-            '#pep-content '
-            'table[class="pep-zero-table docutils align-default"] > '
-            'tbody > tr'
-        )
+    for row in get_soup(
+        session, MAIN_PEP_URL, parse_only=PEP_INDEX_PARTS
+    ).select(
+        '#pep-content '
+        'table[class="pep-zero-table docutils align-default"] > '
+        'tbody > tr'
     ):
         link = urljoin(
             MAIN_PEP_URL,
@@ -148,56 +265,157 @@ def pep(session):
                 attrs={'href': re.compile(r'pep-\d{4}/$')}
             )['href']
         )
-        status_from_pep_list = ''
+        pep_type = status_from_pep_list = ''
         try:
             type_status = find_tag(soup=row, tag='abbr').text
+            pep_type = type_status[:1]
             if len(type_status) == 2:
                 status_from_pep_list = type_status[1]
         except ParserFindTagException:
             empty_type_and_status_columns.append(link)
-        try:
-            pep_page_soup = get_soup(
-                session, link
-            )
-        except ConnectionError:
-            bad_links.append(
-                BAD_LINK.format(
-                    link=link
-                )
-            )
-            continue
-        status_from_pep_page = find_tag(
-            soup=pep_page_soup,
-            tag='dl',
-            attrs={'class': 'rfc2822 field-list simple'}
-        ).find(
-            string='Status'
-        ).find_next('abbr').text
-        if (
-            status_from_pep_page
-            in EXPECTED_STATUS[status_from_pep_list]
-        ):
-            statuses_nums[status_from_pep_page] += 1
-        else:
-            mismatched_statuses.append(
-                MISMATCHED_STATUSES.format(
-                    status_from_pep_list=status_from_pep_list,
-                    status_from_pep_page=status_from_pep_page,
-                    link=link
-                )
-            )
-    for message, log_elements in {
-        MISMATCHED_STATUSES_LOG: mismatched_statuses,
-        EMPTY_TYPE_STATUS_COLUMN_LOG: empty_type_and_status_columns,
-        BAD_LINKS_LOG: bad_links
+        pep_list.append((
+            link,
+            status_from_pep_list,
+            fingerprint(row.get_text('\t')),
+            pep_type
+        ))
+    return pep_list, empty_type_and_status_columns
+
+
+def get_pep_page_statuses(session, links, cli_args=None, extract=None):
+    from tqdm import tqdm
+
+    return dict(tqdm(
+        crawl(
+            session,
+            links,
+            extract or PEP_STATUS_EXTRACTORS[
+                getattr(cli_args, 'backend', BS4_BACKEND)
+            ],
+            cli_args
+        ),
+        total=len(links)
+    ))
+
+
+def get_pep_bulk_statuses(session, pep_list, cli_args=None):
+    """Берёт статусы PEP из общего файла метаданных, если выбран этот
+    источник. Возвращает найденные статусы и строки общего списка,
+    страницы которых всё равно нужно загрузить."""
+    if getattr(cli_args, 'pep_source', PEP_PAGES_SOURCE) != PEP_BULK_SOURCE:
+        return {}, pep_list
+    bulk_statuses = load_pep_statuses(
+        session, urljoin(MAIN_PEP_URL, PEPS_JSON_PATH), PEPS_JSON_FILE
+    )
+    if bulk_statuses is None:
+        return {}, pep_list
+    statuses, pages_list = split_by_bulk_statuses(pep_list, bulk_statuses)
+    logging.info(
+        BULK_STATUSES_LOG.format(
+            bulk=len(statuses),
+            pages=len(dict.fromkeys(link for link, *_ in pages_list))
+        ),
+        extra={'metrics': {'pages_from_bulk': len(statuses)}}
+    )
+    return statuses, pages_list
+
+
+def get_pep_page_statuses_incremental(session, pep_list, cli_args):
+    """Загружает только страницы PEP, строка которых в общем списке
+    изменилась с прошлого запуска или ответ в кеше устарел;
+    статусы остальных берутся из хранилища состояния."""
+    rows = {
+        link: (row_fingerprint, status_from_pep_list)
+        for link, status_from_pep_list, row_fingerprint, _ in pep_list
+    }
+    statuses_from_pep_pages = {
+        link: page_status
+        for link, (row_fingerprint, _, page_status, _)
+        in load_pep_state(PEP_STATE_FILE).items()
+        if link in rows
+        and rows[link][0] == row_fingerprint
+        and is_cache_fresh(session, link)
+    }
+    links = [link for link in rows if link not in statuses_from_pep_pages]
+    fetched = get_pep_page_statuses(
+        session,
+        links,
+        cli_args,
+        extract=partial(
+            extract_with_fingerprint,
+            PEP_STATUS_EXTRACTORS[getattr(cli_args, 'backend', BS4_BACKEND)]
+        )
+    )
+    save_pep_state(
+        PEP_STATE_FILE,
+        {
+            link: (*rows[link], *result)
+            for link, result in fetched.items()
+            if result is not None
+        }
+    )
+    logging.info(
+        INCREMENTAL_LOG.format(
+            fetched=len(links), stored=len(statuses_from_pep_pages)
+        ),
+        extra={'metrics': {'pages_from_state': len(statuses_from_pep_pages)}}
+    )
+    for link, result in fetched.items():
+        statuses_from_pep_pages[link] = (
+            result[0] if result is not None else None
+        )
+    return statuses_from_pep_pages
+
+
+@rows_list
+def pep(session, cli_args=None):
+    pep_list, empty_type_and_status_columns = get_pep_list(session)
+    statuses_from_pep_pages, pages_list = get_pep_bulk_statuses(
+        session, pep_list, cli_args
+    )
+    if getattr(cli_args, 'incremental', False):
+        statuses_from_pep_pages.update(get_pep_page_statuses_incremental(
+            session, pages_list, cli_args
+        ))
+    else:
+        # Один PEP может встречаться в нескольких таблицах,
+        # поэтому каждая страница загружается только один раз.
+        statuses_from_pep_pages.update(get_pep_page_statuses(
+            session,
+            list(dict.fromkeys(link for link, *_ in pages_list)),
+            cli_args
+        ))
+    table = make_pep_table(pep_list, statuses_from_pep_pages)
+    matched, mismatched, _ = reconcile(table)
+    mismatched_statuses = [
+        MISMATCHED_STATUSES.format(
+            status_from_pep_list=status_from_pep_list,
+            status_from_pep_page=status_from_pep_page,
+            link=link
+        )
+        for link, status_from_pep_list, status_from_pep_page
+        in select_links(table, mismatched)
+    ]
+    bad_links = [
+        BAD_LINK.format(link=link) for link in missing_links(table)
+    ]
+    for message, (log_elements, metric) in {
+        MISMATCHED_STATUSES_LOG: (mismatched_statuses, 'mismatched_statuses'),
+        EMPTY_TYPE_STATUS_COLUMN_LOG: (
+            empty_type_and_status_columns, 'empty_type_status'
+        ),
+        BAD_LINKS_LOG: (bad_links, 'bad_links')
     }.items():
         if log_elements:
-            logging.info(message.format(data=log_elements))
-    return [
-        STATUS_NUMBERS_HEAD,
-        *statuses_nums.items(),
-        (TOTAL_NUMBERS_HEAD, sum(statuses_nums.values()))
-    ]
+            logging.info(
+                message.format(data=log_elements),
+                extra={'metrics': {metric: len(log_elements)}}
+            )
+    yield from {
+        PEP_STATUSES_TABLE: partial(status_rows, matched),
+        PEP_TYPES_TABLE: partial(type_status_rows, table),
+        PEP_MISMATCHES_TABLE: partial(mismatch_rows, mismatched),
+    }[getattr(cli_args, 'pep_table', PEP_STATUSES_TABLE)]()
 
 
 MODE_TO_FUNCTION = {
@@ -208,11 +426,218 @@ MODE_TO_FUNCTION = {
 }
 
 
+def select_modes(cli_args):
+    """Возвращает копию cli_args на каждый выбранный режим: режимы
+    и способы вывода работают с одним режимом в cli_args.mode."""
+    modes = (
+        MODE_TO_FUNCTION if ALL_MODES in cli_args.mode
+        else dict.fromkeys(cli_args.mode)
+    )
+    return [
+        Namespace(**{**vars(cli_args), 'mode': mode}) for mode in modes
+    ]
+
+
+def run_mode(session, cli_args):
+    mode_function = MODE_TO_FUNCTION[cli_args.mode]
+    # Строки режимов с генератором уходят в вывод по мере загрузки.
+    results = getattr(mode_function, 'stream', mode_function)(
+        session, cli_args=cli_args
+    )
+    if results is not None:
+        control_output(results, cli_args)
+
+
+def collect_results(session, modes_args):
+    """Выполняет режимы одновременно над общей сессией и возвращает
+    пары (аргументы режима, строки) в порядке modes_args.
+
+    Режим, завершившийся ошибкой, записывается в журнал и пропускается,
+    остальные режимы продолжают работу.
+    """
+    with ThreadPoolExecutor(max_workers=len(modes_args)) as executor:
+        futures = [
+            executor.submit(
+                MODE_TO_FUNCTION[mode_args.mode], session, cli_args=mode_args
+            )
+            for mode_args in modes_args
+        ]
+    collected = []
+    for mode_args, future in zip(modes_args, futures):
+        try:
+            collected.append((mode_args, future.result()))
+        except Exception as error:
+            logging.exception(
+                MODE_ERROR_LOG.format(mode=mode_args.mode, error=error),
+                extra={'metrics': {'failed_modes': 1}}
+            )
+    return collected
+
+
+def run_modes(session, modes_args):
+    if len(modes_args) == 1:
+        return run_mode(session, modes_args[0])
+    # Строки режимов собираются одновременно, а выводятся по очереди,
+    # чтобы вывод разных режимов не перемешивался.
+    for mode_args, results in collect_results(session, modes_args):
+        if results is not None:
+            control_output(results, mode_args)
+
+
+def compact(session):
+    sizes = compact_cache(session)
+    if sizes is not None:
+        logging.info(CACHE_COMPACT_LOG.format(
+            before=sizes[0], after=sizes[1]
+        ))
+
+
+def throughput_message(host_throughput):
+    """Строка журнала о хосте; частота упоминается, только если
+    задан --rate-limit."""
+    return THROUGHPUT_LOG.format(**{
+        **host_throughput._asdict(),
+        'rate': (
+            THROUGHPUT_RATE_LOG.format(rate=host_throughput.rate)
+            if host_throughput.rate is not None else ''
+        )
+    })
+
+
+def run_metrics(session):
+    """Итоговые метрики запуска для записи о его завершении."""
+    return {
+        'run_success': 1,
+        # Ответы одновременных запросов того же url не загружались
+        # отдельно и не считаются ни загрузками, ни попаданиями в кеш.
+        'pages_fetched': (
+            sum(session.cache_stats.values())
+            - session.cache_stats[CACHE_SHARED]
+        ),
+        'cache_hits': (
+            session.cache_stats[CACHE_HIT]
+            + session.cache_stats[CACHE_REVALIDATED]
+        ),
+        'bytes_downloaded': profiler.size('fetch_response/network'),
+        'parse_seconds': round(
+            profiler.total('make_soup') + profiler.total('make_tree'), 3
+        ),
+    }
+
+
+def finish_run(session, cli_args):
+    if cli_args.profile:
+        logging.info(PROFILE_LOG.format(table=profiler.summary_table()))
+    if cli_args.profile_json:
+        profiler.dump_json(cli_args.profile_json)
+        logging.info(PROFILE_JSON_LOG.format(path=cli_args.profile_json))
+
+    if cli_args.cache_stats:
+        memos = (session.soup_memo, session.extract_memo)
+        logging.info(CACHE_STATS_LOG.format(
+            hit=session.cache_stats[CACHE_HIT],
+            miss=session.cache_stats[CACHE_MISS],
+            revalidated=session.cache_stats[CACHE_REVALIDATED],
+            memo_hits=sum(memo.hits for memo in memos),
+            memo_total=sum(memo.hits + memo.misses for memo in memos)
+        ))
+
+    retry_policy = session.retry_policy
+    if retry_policy.retried or retry_policy.failed:
+        logging.info(
+            RETRIES_LOG.format(
+                retries=sum(retry_policy.retried.values()),
+                urls=len(retry_policy.retried),
+                failed=retry_policy.failed
+            ),
+            extra={'metrics': {
+                'retries': sum(retry_policy.retried.values()),
+                'failed_requests': len(retry_policy.failed)
+            }}
+        )
+
+    for host_throughput in session.scheduler.throughput():
+        logging.info(
+            throughput_message(host_throughput),
+            extra={'metrics': {
+                'network_requests': host_throughput.requests,
+                'slowdowns': host_throughput.slowdowns
+            }}
+        )
+
+    logging.info(
+        FINISH_PARSER_LOG,
+        extra={'metrics': run_metrics(session)}
+    )
+
+
+def export_metrics(cli_args, metrics_handler):
+    if cli_args is not None and cli_args.metrics_file:
+        write_metrics(
+            cli_args.metrics_file,
+            metrics_handler.collect(),
+            labels={'mode': ','.join(cli_args.mode)}
+        )
+
+
+def output_changes(collected, previous_results):
+    for mode_args, results in collected:
+        if (
+            results is not None
+            and results == previous_results.get(mode_args.mode)
+        ):
+            logging.info(WATCH_UNCHANGED_LOG.format(mode=mode_args.mode))
+            continue
+        if results is not None:
+            control_output(results, mode_args)
+        previous_results[mode_args.mode] = results
+
+
+def watch(session, cli_args, metrics_handler):
+    """Перезапускает режимы каждые cli_args.watch секунд в одном процессе.
+
+    Сессия с открытым кешем и пулом соединений переиспользуется между
+    запусками; результаты режима выводятся, только если они изменились.
+    Ошибка одного запуска записывается в журнал и не прерывает
+    наблюдение. Остановка — по Ctrl+C.
+    """
+    modes_args = select_modes(cli_args)
+    previous_results = {}
+    try:
+        while True:
+            started = time.monotonic()
+            logging.info(WATCH_RUN_LOG.format(
+                modes=', '.join(mode_args.mode for mode_args in modes_args)
+            ))
+            try:
+                output_changes(
+                    collect_results(session, modes_args), previous_results
+                )
+                finish_run(session, cli_args)
+            except Exception as error:
+                logging.exception(GENERAL_ERROR_LOG.format(error=error))
+            export_metrics(cli_args, metrics_handler)
+            metrics_handler.reset()
+            session.cache_stats.clear()
+            session.retry_policy.reset_stats()
+            session.scheduler.reset_stats()
+            profiler.reset()
+            time.sleep(
+                max(0, cli_args.watch - (time.monotonic() - started))
+            )
+    except KeyboardInterrupt:
+        logging.info(WATCH_STOPPED_LOG)
+
+
 def main():
+    metrics_handler = MetricsHandler()
+    args = None
     try:
-        configure_logging()
+        configure_logging(metrics_handler)
         logging.info(START_PARSER_LOG)
-        arg_parser = configure_argument_parser(MODE_TO_FUNCTION.keys())
+        arg_parser = configure_argument_parser(
+            (*MODE_TO_FUNCTION, ALL_MODES)
+        )
         args = arg_parser.parse_args()
 
         logging.info(
@@ -221,25 +646,32 @@ def main():
             )
         )
 
-        session = requests_cache.CachedSession()
-        if args.clear_cache:
-            session.cache.clear()
-
-        parser_mode = args.mode
-        results = MODE_TO_FUNCTION[parser_mode](session)
-
-        if results is not None:
-            control_output(results, args)
-
-        logging.info(
-            FINISH_PARSER_LOG
+        modes_args = select_modes(args)
+        session = configure_session(
+            args, concurrent_modes=len(modes_args)
         )
+        # Закрытие сессии закрывает и кеш: хранилище segments только
+        # при этом записывает индекс, без которого следующий запуск
+        # перечитывает весь сегмент.
+        with session:
+            if args.cache_compact:
+                compact(session)
+            if args.profile or args.profile_json or args.metrics_file:
+                profiler.enable()
+            with recording(session), cprofile_to(args.cprofile):
+                if args.watch:
+                    # Метрики в режиме наблюдения записываются после
+                    # каждого запуска внутри watch.
+                    return watch(session, args, metrics_handler)
+                run_modes(session, modes_args)
+            finish_run(session, args)
     except Exception as error:
         logging.exception(
             GENERAL_ERROR_LOG.format(
                 error=error
             ),
         )
+    export_metrics(args, metrics_handler)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+import threading
+
+# Размер записи оценивается по размеру исходной страницы; дерево
+# BeautifulSoup занимает в памяти в несколько раз больше.
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Результаты извлечения — короткие кортежи, поэтому их хранится
+# намного больше, а размер записи не учитывается.
+EXTRACT_MAX_ENTRIES = 16384
+
+
+class SoupMemo:
+    """Кеш разобранных страниц в памяти с вытеснением давно
+    не использованных (LRU).
+
+    Записи ограничены и по числу, и по суммарному размеру страниц.
+    Одновременные вызовы с одним ключом разбирают страницу один раз:
+    остальные потоки ждут результат первого. Деревья отдаются общими,
+    поэтому вызывающие не должны их изменять.
+    """
+
+    def __init__(
+        self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, size, parse):
+        """Возвращает дерево по ключу, вызывая parse() при промахе."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            shared = self.in_flight.get(key)
+            if shared is None:
+                shared = self.in_flight[key] = Future()
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+        if not owner:
+            return shared.result()
+        try:
+            soup = parse()
+        except Exception as error:
+            with self.lock:
+                del self.in_flight[key]
+            shared.set_exception(error)
+            raise
+        with self.lock:
+            del self.in_flight[key]
+            self.misses += 1
+            self.store(key, soup, size)
+        shared.set_result(soup)
+        return soup
+
+    def lookup(self, key, default=None):
+        """Возвращает сохранённое значение, не вызывая разбор."""
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+
+    def put(self, key, soup, size):
+        """Сохраняет значение, полученное вызывающим, как промах."""
+        with self.lock:
+            self.misses += 1
+            self.store(key, soup, size)
+
+    def store(self, key, soup, size):
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (soup, size)
+        self.total_bytes += size
+        # Только что добавленная запись остаётся, даже если она одна
+        # больше max_bytes.
+        while len(self.entries) > 1 and (
+            len(self.entries) > self.max_entries
+            or self.total_bytes > self.max_bytes
+        ):
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
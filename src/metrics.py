@@ -0,0 +1,97 @@
+import logging
+import os
+from pathlib import Path
+
+METRICS_PREFIX = 'pep_parser_'
+# Имя метрики: описание. Все метрики — gauge со значением
+# за последний запуск, как принято для textfile collector.
+METRICS = {
+    'run_duration_seconds': 'Длительность запуска, секунды',
+    'run_success': 'Запуск завершился без ошибки',
+    'last_run_timestamp_seconds': 'Время окончания запуска, unix time',
+    'pages_fetched': 'Запрошено страниц',
+    'cache_hits': 'Страниц взято из кеша',
+    'cache_hit_ratio': 'Доля страниц, взятых из кеша',
+    'bytes_downloaded': 'Получено байт страниц и архивов',
+    'parse_seconds': 'Время построения деревьев страниц, секунды',
+    'mismatched_statuses': 'PEP с несовпадающими статусами',
+    'empty_type_status': 'PEP без типа и статуса в общем списке',
+    'bad_links': 'Ссылки, которые не удалось загрузить',
+    'failed_modes': 'Режимы, завершившиеся ошибкой',
+    'retries': 'Повторных запросов',
+    'network_requests': 'Запросов, отправленных в сеть',
+    'slowdowns': 'Снижений скорости из-за перегрузки хостов',
+    'failed_requests': 'Запросы, не удавшиеся после всех повторов',
+    'archives_downloaded': 'Загружено архивов',
+    'pages_from_state': 'Статусов PEP взято из хранилища состояния',
+    'pages_from_bulk': 'Статусов PEP взято из общего файла метаданных',
+}
+
+
+class MetricsHandler(logging.Handler):
+    """Собирает метрики из записей журнала.
+
+    Точки журналирования передают значения через
+    extra={'metrics': {имя: значение}}; значения одной метрики
+    из разных записей складываются. Длительность запуска считается
+    от первой до последней записи журнала.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reset()
+
+    def reset(self):
+        self.values = dict.fromkeys(METRICS, 0)
+        self.first_created = None
+        self.last_created = None
+
+    def emit(self, record):
+        if self.first_created is None:
+            self.first_created = record.created
+        self.last_created = record.created
+        for name, value in getattr(record, 'metrics', {}).items():
+            self.values[name] += value
+
+    def collect(self):
+        values = dict(self.values)
+        if self.first_created is not None:
+            values['run_duration_seconds'] = round(
+                self.last_created - self.first_created, 3
+            )
+            values['last_run_timestamp_seconds'] = round(
+                self.last_created, 3
+            )
+        if values['pages_fetched']:
+            values['cache_hit_ratio'] = round(
+                values['cache_hits'] / values['pages_fetched'], 4
+            )
+        return values
+
+
+def format_metrics(values, labels):
+    label_text = ','.join(
+        '{name}="{value}"'.format(
+            name=name,
+            value=str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for name, value in labels.items()
+    )
+    lines = []
+    for name, description in METRICS.items():
+        full_name = METRICS_PREFIX + name
+        lines += (
+            f'# HELP {full_name} {description}',
+            f'# TYPE {full_name} gauge',
+            f'{full_name}{{{label_text}}} {values[name]}',
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics(path, values, labels):
+    """Атомарно записывает метрики в формате Prometheus textfile
+    collector: коллектор никогда не увидит файл записанным наполовину."""
+    path = Path(path)
+    temp_path = path.with_name(path.name + '.tmp')
+    temp_path.write_text(format_metrics(values, labels), encoding='utf-8')
+    os.replace(temp_path, path)
@@ -1,16 +1,28 @@
+from contextlib import closing
 import csv
 
 import datetime as dt
+from itertools import islice
+import json
 import logging
+import sqlite3
 
-from prettytable import PrettyTable
-
+from columnar import get_extension, write_columns
+from profiling import profiled_output
 from constants import (
     CSV_FILE_NAME,
+    JSONL_FILE_NAME,
+    COLUMNAR_FILE_NAME,
+    SQLITE_FILE_NAME,
     DATETIME_FORMAT,
     PRETTY_OUTPUT,
     FILE_OUTPUT,
+    JSONL_OUTPUT,
+    COLUMNAR_OUTPUT,
+    SQLITE_OUTPUT,
     BASE_DIR,
+    PEP_MODE,
+    PEP_STATUSES_TABLE,
     RESULTS_FILES_DIR_NAME
 )
 
@@ -19,36 +31,136 @@ SAVE_FILE_LOG = (
     'был сохранён: {file_path}'
 )
 
+SQLITE_BATCH_SIZE = 500
+SQLITE_TYPES = {int: 'INTEGER', float: 'REAL'}
+CREATE_TABLE_SQL = (
+    'CREATE TABLE IF NOT EXISTS "{table}" '
+    '(run_at TEXT NOT NULL, {columns})'
+)
+INSERT_SQL = 'INSERT INTO "{table}" VALUES (?, {placeholders})'
+
 
 def default_output(results, **kwargs):
     for row in results:
-        print(*row)
+        print(*row, flush=True)
 
 
 def pretty_output(results, **kwargs):
+    # Ширину колонок таблицы можно узнать только по всем строкам,
+    # поэтому здесь результаты накапливаются целиком.
+    from prettytable import PrettyTable
+
+    rows = iter(results)
     table = PrettyTable()
-    table.field_names = results[0]
+    table.field_names = next(rows)
     table.align = 'l'
-    table.add_rows(results[1:])
+    table.add_rows(list(rows))
     print(table)
 
 
-def file_output(results, encode='utf-8', **kwargs):
+def result_name(cli_args):
+    """Имя результата режима в именах файлов и таблиц SQLite.
+
+    Таблицы режима pep (--pep-table) устроены по-разному, поэтому
+    к имени режима добавляется вид таблицы: pep_types, pep_mismatches.
+    Таблица статусов по умолчанию сохраняется под прежним именем pep.
+    """
+    pep_table = getattr(cli_args, 'pep_table', PEP_STATUSES_TABLE)
+    if cli_args.mode != PEP_MODE or pep_table == PEP_STATUSES_TABLE:
+        return cli_args.mode
+    return f'{cli_args.mode}_{pep_table}'
+
+
+def get_file_path(file_name, cli_args, **name_kwargs):
     # RESULTS_DIR.mkdir(exist_ok=True)
     results_dir = BASE_DIR / RESULTS_FILES_DIR_NAME
     results_dir.mkdir(exist_ok=True)
-    file_path = results_dir / CSV_FILE_NAME.format(
-        parser_mode=kwargs['cli_args'].mode,
+    return results_dir / file_name.format(
+        parser_mode=result_name(cli_args),
         datetime_now=dt.datetime.now().strftime(
             DATETIME_FORMAT
-        )
+        ),
+        **name_kwargs
     )
+
+
+def file_output(results, encode='utf-8', **kwargs):
+    file_path = get_file_path(CSV_FILE_NAME, kwargs['cli_args'])
     with open(
         file_path, 'w', encoding=encode
     ) as results_file:
-        csv.writer(
-            results_file, dialect=csv.unix_dialect
-        ).writerows(results)
+        writer = csv.writer(results_file, dialect=csv.unix_dialect)
+        # Каждая строка сразу сбрасывается на диск: если парсер упадёт
+        # посреди обхода, в файле останутся уже полученные строки.
+        for row in results:
+            writer.writerow(row)
+            results_file.flush()
+
+    logging.info(SAVE_FILE_LOG.format(file_path=file_path))
+
+
+def jsonl_output(results, encode='utf-8', **kwargs):
+    file_path = get_file_path(JSONL_FILE_NAME, kwargs['cli_args'])
+    rows = iter(results)
+    head = next(rows)
+    with open(file_path, 'w', encoding=encode) as results_file:
+        for row in rows:
+            results_file.write(
+                json.dumps(dict(zip(head, row)), ensure_ascii=False) + '\n'
+            )
+            results_file.flush()
+
+    logging.info(SAVE_FILE_LOG.format(file_path=file_path))
+
+
+def columnar_output(results, **kwargs):
+    file_path = get_file_path(
+        COLUMNAR_FILE_NAME, kwargs['cli_args'], extension=get_extension()
+    )
+    rows = iter(results)
+    write_columns(file_path, next(rows), rows)
+
+    logging.info(SAVE_FILE_LOG.format(file_path=file_path))
+
+
+def column_types(head, first_row):
+    return getattr(head, 'types', None) or tuple(map(type, first_row))
+
+
+def sqlite_output(results, **kwargs):
+    """Добавляет строки в таблицу result_name в общей базе результатов.
+
+    Строки вставляются пачками через executemany по мере получения;
+    тип колонок берётся из схемы заголовка, а без неё определяется
+    по первой строке данных.
+    """
+    file_path = get_file_path(SQLITE_FILE_NAME, kwargs['cli_args'])
+    table = result_name(kwargs['cli_args']).replace('-', '_')
+    run_at = dt.datetime.now().isoformat(timespec='seconds')
+    rows = iter(results)
+    head = next(rows)
+    batch = list(islice(rows, SQLITE_BATCH_SIZE))
+    with closing(sqlite3.connect(file_path)) as connection:
+        connection.execute(CREATE_TABLE_SQL.format(
+            table=table,
+            columns=', '.join(
+                '"{name}" {type}'.format(
+                    name=name, type=SQLITE_TYPES.get(value_type, 'TEXT')
+                )
+                for name, value_type in zip(
+                    head, column_types(head, batch[0] if batch else head)
+                )
+            )
+        ))
+        insert_sql = INSERT_SQL.format(
+            table=table, placeholders=', '.join('?' * len(head))
+        )
+        while batch:
+            connection.executemany(
+                insert_sql, ((run_at, *row) for row in batch)
+            )
+            connection.commit()
+            batch = list(islice(rows, SQLITE_BATCH_SIZE))
 
     logging.info(SAVE_FILE_LOG.format(file_path=file_path))
 
@@ -56,9 +168,17 @@ def file_output(results, encode='utf-8', **kwargs):
 OUTPUTS = {
         PRETTY_OUTPUT: pretty_output,
         FILE_OUTPUT: file_output,
+        JSONL_OUTPUT: jsonl_output,
+        COLUMNAR_OUTPUT: columnar_output,
+        SQLITE_OUTPUT: sqlite_output,
         None: default_output
     }
 
 
 def control_output(results, cli_args):
-    OUTPUTS[cli_args.output](results, cli_args=cli_args)
+    profiled_output(
+        f'output/{cli_args.output or "default"}',
+        OUTPUTS[cli_args.output],
+        results,
+        cli_args=cli_args
+    )
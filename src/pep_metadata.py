@@ -0,0 +1,82 @@
+"""Статусы всех PEP из общего файла метаданных peps.python.org.
+
+Файл api/peps.json содержит заголовки всех PEP, поэтому статусы
+можно получить одним запросом вместо запроса на каждую страницу.
+Последняя удачно загруженная копия сохраняется на диск и используется,
+когда сайт недоступен.
+"""
+import json
+import logging
+from pathlib import Path
+import re
+
+from constants import EXPECTED_STATUS
+from utils import get_response
+
+PEP_NUMBER_PATTERN = re.compile(r'pep-(\d+)/?$')
+BULK_ERROR_LOG = 'Не удалось загрузить метаданные PEP {url}: {error}'
+LOCAL_COPY_LOG = 'Метаданные PEP взяты из сохранённой копии {path}'
+LOCAL_COPY_ERROR_LOG = 'Не удалось прочитать копию {path}: {error}'
+
+
+def pep_number(link):
+    match = PEP_NUMBER_PATTERN.search(link)
+    return int(match.group(1)) if match else None
+
+
+def parse_pep_statuses(content):
+    """Возвращает словарь {номер PEP: статус} из содержимого peps.json."""
+    try:
+        return {
+            int(number): metadata['status']
+            for number, metadata in json.loads(content).items()
+        }
+    except (AttributeError, KeyError, TypeError) as error:
+        raise ValueError(error)
+
+
+def load_pep_statuses(session, url, local_path):
+    """Загружает статусы всех PEP и обновляет сохранённую копию;
+    при сбое читает копию. Возвращает None, если нет ни ответа,
+    ни копии."""
+    local_path = Path(local_path)
+    try:
+        content = get_response(session, url).content
+        statuses = parse_pep_statuses(content)
+    except (ConnectionError, ValueError) as error:
+        logging.warning(BULK_ERROR_LOG.format(url=url, error=error))
+        return load_local_copy(local_path)
+    temp_path = local_path.with_name(local_path.name + '.tmp')
+    temp_path.write_bytes(content)
+    temp_path.replace(local_path)
+    return statuses
+
+
+def load_local_copy(local_path):
+    if not local_path.exists():
+        return None
+    try:
+        statuses = parse_pep_statuses(local_path.read_bytes())
+    except (OSError, ValueError) as error:
+        logging.warning(LOCAL_COPY_ERROR_LOG.format(
+            path=local_path, error=error
+        ))
+        return None
+    logging.info(LOCAL_COPY_LOG.format(path=local_path))
+    return statuses
+
+
+def split_by_bulk_statuses(pep_list, bulk_statuses):
+    """Делит строки общего списка на статусы, взятые из метаданных,
+    и строки, страницы которых нужно загрузить: PEP нет в метаданных
+    или статус в них не согласуется со статусом из списка."""
+    statuses = {}
+    pages_list = []
+    for row in pep_list:
+        link, status_from_pep_list, *_ = row
+        bulk_status = bulk_statuses.get(pep_number(link))
+        if bulk_status in EXPECTED_STATUS.get(status_from_pep_list, ()):
+            statuses[link] = bulk_status
+        else:
+            pages_list.append(row)
+    return statuses, pages_list
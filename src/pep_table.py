@@ -0,0 +1,124 @@
+from collections import Counter
+
+from constants import EXPECTED_STATUS, TOTAL_NUMBERS_HEAD
+from rows import (
+    MISMATCH_SCHEMA,
+    PEP_STATUS_SCHEMA,
+    TYPE_STATUS_SCHEMA,
+    MismatchRow,
+    PepStatusRow,
+    TypeStatusRow
+)
+
+PEP_COLUMNS = ('link', 'type', 'list_status', 'page_status')
+EXPECTED_PAIRS = frozenset(
+    (list_status, page_status)
+    for list_status, page_statuses in EXPECTED_STATUS.items()
+    for page_status in page_statuses
+)
+NO_TYPE = '—'
+
+
+def make_pep_table(pep_list, page_statuses):
+    """Собирает колонки из строк get_pep_list и статусов страниц;
+    для страниц, которые не удалось загрузить, статус — None."""
+    links, list_statuses, _, types = (
+        zip(*pep_list) if pep_list else ((),) * 4
+    )
+    return {
+        'link': links,
+        'type': types,
+        'list_status': list_statuses,
+        'page_status': tuple(map(page_statuses.get, links)),
+    }
+
+
+def reconcile(table):
+    """Сверяет статусы из списка и со страниц.
+
+    Строки сводятся к счётчику уникальных пар (статус из списка,
+    статус на странице), и проверка по EXPECTED_STATUS выполняется
+    для каждой пары один раз, а не для каждой строки. Возвращает
+    счётчики совпавших статусов, несовпавших пар и число строк
+    без статуса страницы.
+    """
+    matched = Counter()
+    mismatched = Counter()
+    missing = 0
+    for (list_status, page_status), count in Counter(
+        zip(table['list_status'], table['page_status'])
+    ).items():
+        if page_status is None:
+            missing += count
+        elif (list_status, page_status) in EXPECTED_PAIRS:
+            matched[page_status] += count
+        else:
+            mismatched[list_status, page_status] += count
+    return matched, mismatched, missing
+
+
+def select_links(table, pairs):
+    """Ссылки строк, пара статусов которых входит в pairs."""
+    return [
+        (link, list_status, page_status)
+        for link, list_status, page_status in zip(
+            table['link'], table['list_status'], table['page_status']
+        )
+        if (list_status, page_status) in pairs
+    ]
+
+
+def missing_links(table):
+    """Ссылки строк, страницу которых не удалось загрузить."""
+    return [
+        link
+        for link, page_status in zip(table['link'], table['page_status'])
+        if page_status is None
+    ]
+
+
+def status_rows(matched):
+    yield PEP_STATUS_SCHEMA
+    yield from map(PepStatusRow._make, matched.items())
+    yield PepStatusRow(TOTAL_NUMBERS_HEAD, sum(matched.values()))
+
+
+def type_status_rows(table):
+    """Сводная таблица тип PEP × статус на странице в длинном виде.
+
+    Строка на каждую встретившуюся пару (тип, статус) с числом PEP,
+    затем итоги по типам, по статусам и общий итог: вместо типа
+    или статуса в них стоит TOTAL_NUMBERS_HEAD. Колонки не зависят
+    от набора статусов, поэтому таблицу можно дописывать в одну
+    и ту же таблицу базы от запуска к запуску.
+    """
+    counts = Counter(
+        (pep_type or NO_TYPE, page_status)
+        for pep_type, page_status in zip(table['type'], table['page_status'])
+        if page_status is not None
+    )
+    types = dict.fromkeys(pep_type for pep_type, _ in counts)
+    statuses = dict.fromkeys(status for _, status in counts)
+    yield TYPE_STATUS_SCHEMA
+    for pep_type in types:
+        for status in statuses:
+            if counts[pep_type, status]:
+                yield TypeStatusRow(pep_type, status, counts[pep_type, status])
+    for pep_type in types:
+        yield TypeStatusRow(pep_type, TOTAL_NUMBERS_HEAD, sum(
+            counts[pep_type, status] for status in statuses
+        ))
+    for status in statuses:
+        yield TypeStatusRow(TOTAL_NUMBERS_HEAD, status, sum(
+            counts[pep_type, status] for pep_type in types
+        ))
+    yield TypeStatusRow(
+        TOTAL_NUMBERS_HEAD, TOTAL_NUMBERS_HEAD, sum(counts.values())
+    )
+
+
+def mismatch_rows(mismatched):
+    """Матрица несовпадений: пары статусов и число PEP с ними."""
+    yield MISMATCH_SCHEMA
+    for (list_status, page_status), count in mismatched.most_common():
+        yield MismatchRow(list_status, page_status, count)
@@ -0,0 +1,193 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import cProfile
+from functools import wraps
+import json
+import threading
+from time import perf_counter
+
+PERCENTILES = (50, 90, 99)
+PROFILE_HEAD = (
+    'Этап', 'Вызовы', 'Всего, с', 'Среднее, мс',
+    *(f'p{percentile}, мс' for percentile in PERCENTILES),
+    'Байты'
+)
+PROFILE_JSON_FIELDS = (
+    'stage', 'calls', 'total_s', 'mean_ms',
+    *(f'p{percentile}_ms' for percentile in PERCENTILES),
+    'bytes'
+)
+
+
+class Profiler:
+    """Собирает длительности и объём данных по этапам работы парсера.
+
+    Пока замеры не включены, обёртки этапов сразу вызывают исходную
+    функцию. Замеры из процессов пула разбора (--parse-workers)
+    в основной процесс не попадают.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.durations = defaultdict(list)
+        self.sizes = defaultdict(int)
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        with self.lock:
+            self.durations.clear()
+            self.sizes.clear()
+
+    def record(self, stage, seconds, size=None):
+        with self.lock:
+            self.durations[stage].append(seconds)
+            if size is not None:
+                self.sizes[stage] += size
+
+    def total(self, stage):
+        with self.lock:
+            return sum(self.durations.get(stage, ()))
+
+    def size(self, stage):
+        with self.lock:
+            return self.sizes.get(stage, 0)
+
+    def summary(self):
+        """Возвращает строки сводки: этап, вызовы, суммарное время,
+        среднее и перцентили в миллисекундах, байты."""
+        with self.lock:
+            durations = {
+                stage: sorted(values)
+                for stage, values in self.durations.items()
+            }
+            sizes = dict(self.sizes)
+        return [
+            (
+                stage,
+                len(values),
+                round(sum(values), 3),
+                round(sum(values) / len(values) * 1000, 3),
+                *(
+                    round(percentile_of(values, percentile) * 1000, 3)
+                    for percentile in PERCENTILES
+                ),
+                sizes.get(stage)
+            )
+            for stage, values in sorted(
+                durations.items(), key=lambda item: -sum(item[1])
+            )
+        ]
+
+    def summary_table(self):
+        from prettytable import PrettyTable
+
+        table = PrettyTable()
+        table.field_names = PROFILE_HEAD
+        table.align = 'r'
+        table.align[PROFILE_HEAD[0]] = 'l'
+        table.add_rows([
+            (*row[:-1], '' if row[-1] is None else row[-1])
+            for row in self.summary()
+        ])
+        return table.get_string()
+
+    def dump_json(self, path):
+        with open(path, 'w', encoding='utf-8') as profile_file:
+            json.dump(
+                [
+                    dict(zip(PROFILE_JSON_FIELDS, row))
+                    for row in self.summary()
+                ],
+                profile_file,
+                ensure_ascii=False,
+                indent=2
+            )
+
+
+profiler = Profiler()
+
+
+def percentile_of(sorted_values, percentile):
+    index = round(percentile / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def profiled(stage, size=None, kind=None):
+    """Декоратор этапа.
+
+    size(result) — объём данных результата в байтах; kind(result) —
+    уточнение этапа, которое записывается отдельной строкой
+    «этап/уточнение», например попадание в кеш или поход в сеть.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            started = perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except Exception:
+                profiler.record(stage, perf_counter() - started)
+                raise
+            elapsed = perf_counter() - started
+            result_size = size(result) if size is not None else None
+            profiler.record(stage, elapsed, result_size)
+            if kind is not None:
+                profiler.record(
+                    f'{stage}/{kind(result)}', elapsed, result_size
+                )
+            return result
+        return wrapper
+    return decorator
+
+
+class TimedRows:
+    """Итератор строк, считающий время, проведённое в источнике."""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = perf_counter()
+        try:
+            return next(self.rows)
+        finally:
+            self.seconds += perf_counter() - started
+
+
+def profiled_output(stage, output_function, results, **kwargs):
+    """Вызывает функцию вывода и записывает только её собственное время.
+
+    Строки режимов с генератором вычисляются по мере вывода, поэтому
+    время получения строк вычитается из времени вывода.
+    """
+    if not profiler.enabled:
+        return output_function(results, **kwargs)
+    rows = TimedRows(results)
+    started = perf_counter()
+    output_function(rows, **kwargs)
+    profiler.record(stage, perf_counter() - started - rows.seconds)
+
+
+@contextmanager
+def cprofile_to(path):
+    """Профилирует блок через cProfile и сохраняет статистику pstats
+    в path; без path блок выполняется как есть."""
+    if path is None:
+        yield
+        return
+    calls_profiler = cProfile.Profile()
+    calls_profiler.enable()
+    try:
+        yield
+    finally:
+        calls_profiler.disable()
+        calls_profiler.dump_stats(path)
@@ -0,0 +1,204 @@
+from collections import namedtuple
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class HostRateLimiter:
+    """Ограничивает частоту запросов к каждому хосту.
+
+    Метод reserve не блокирует вызывающего, а резервирует ближайший
+    свободный слот и возвращает, сколько секунд нужно подождать:
+    ждать вызывающий может уже без блокировки ограничителя.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.intervals = {}
+        self.next_slots = {}
+        self.lock = threading.Lock()
+
+    def set_rate(self, host, rate):
+        with self.lock:
+            self.intervals[host] = 1 / rate
+
+    def reserve(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slots.get(host, now))
+            self.next_slots[host] = slot + self.intervals.get(
+                host, self.interval
+            )
+        return slot - now
+
+
+class BandwidthLimiter:
+    """Ограничивает общую скорость загрузки, байт в секунду.
+
+    Как и HostRateLimiter, резервирует время под очередной кусок данных
+    и возвращает, сколько нужно подождать перед его записью.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.next_slot = None
+        self.lock = threading.Lock()
+
+    def reserve(self, size):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot or now)
+            self.next_slot = slot + size / self.rate
+        return slot - now
+
+
+# Ответы, после которых хост считается перегруженным.
+CONGESTION_STATUSES = frozenset((429, 503))
+HostThroughput = namedtuple(
+    'HostThroughput',
+    'host requests seconds requests_per_second concurrency rate slowdowns'
+)
+
+
+class HostState:
+    def __init__(self, concurrency, rate):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.in_flight = 0
+        self.latency = None
+        self.samples = 0
+        self.last_slowdown = 0.0
+        self.slowdowns = 0
+        self.requests = 0
+        self.first_started = None
+        self.last_finished = None
+
+
+class AdaptiveScheduler:
+    """Планировщик запросов к хостам по схеме AIMD.
+
+    Для каждого хоста ограничены число одновременных запросов
+    и, если задан rate, частота запросов через HostRateLimiter.
+    Ответ 429/503, ошибка соединения или задержка больше
+    latency_factor средней уменьшают оба ограничения вдвое (не чаще
+    раза за среднюю задержку хоста), каждый успешный ответ понемногу
+    возвращает их к max_concurrency и rate. Задержка считается
+    всплеском только после min_samples ответов и если она больше
+    min_spike_latency секунд: иначе обычный разброс быстрых ответов
+    снижал бы ограничения.
+    """
+
+    def __init__(
+        self, max_concurrency, rate=None, latency_factor=3.0,
+        min_rate=0.5, rate_step=0.1, min_samples=5, min_spike_latency=0.5
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_rate = rate
+        self.latency_factor = latency_factor
+        self.min_samples = min_samples
+        self.min_spike_latency = min_spike_latency
+        self.min_rate = min_rate
+        self.rate_step = rate_step
+        self.limiter = HostRateLimiter(rate) if rate else None
+        self.hosts = {}
+        self.condition = threading.Condition()
+
+    def acquire(self, url):
+        """Ждёт свободного места для запроса к хосту url и возвращает
+        время начала запроса для release."""
+        host = urlsplit(url).netloc
+        with self.condition:
+            state = self.hosts.get(host)
+            if state is None:
+                state = self.hosts[host] = HostState(
+                    self.max_concurrency, self.max_rate
+                )
+            while state.in_flight >= int(state.concurrency):
+                self.condition.wait()
+            state.in_flight += 1
+        if self.limiter is not None:
+            time.sleep(self.limiter.reserve(url))
+        started = time.monotonic()
+        with self.condition:
+            if state.first_started is None:
+                state.first_started = started
+        return started
+
+    def release(self, url, started, status=None):
+        """Учитывает результат запроса: status — код ответа или None,
+        если запрос завершился ошибкой."""
+        finished = time.monotonic()
+        latency = finished - started
+        host = urlsplit(url).netloc
+        with self.condition:
+            state = self.hosts[host]
+            state.in_flight -= 1
+            state.requests += 1
+            state.last_finished = finished
+            if (
+                status is None
+                or status in CONGESTION_STATUSES
+                or self.is_latency_spike(state, latency)
+            ):
+                self.slow_down(host, state, finished)
+            else:
+                self.speed_up(host, state)
+                state.samples += 1
+                state.latency = (
+                    latency if state.latency is None
+                    else 0.8 * state.latency + 0.2 * latency
+                )
+            self.condition.notify_all()
+
+    def is_latency_spike(self, state, latency):
+        return (
+            state.samples >= self.min_samples
+            and latency > self.min_spike_latency
+            and latency > self.latency_factor * state.latency
+        )
+
+    def slow_down(self, host, state, now):
+        if now - state.last_slowdown < (state.latency or 0):
+            return
+        state.last_slowdown = now
+        state.slowdowns += 1
+        state.concurrency = max(1.0, state.concurrency / 2)
+        if self.limiter is not None:
+            state.rate = max(self.min_rate, state.rate / 2)
+            self.limiter.set_rate(host, state.rate)
+
+    def speed_up(self, host, state):
+        state.concurrency = min(
+            self.max_concurrency, state.concurrency + 1 / state.concurrency
+        )
+        if self.limiter is not None and state.rate < self.max_rate:
+            state.rate = min(self.max_rate, state.rate + self.rate_step)
+            self.limiter.set_rate(host, state.rate)
+
+    def throughput(self):
+        """Достигнутая производительность по хостам."""
+        with self.condition:
+            report = []
+            for host, state in self.hosts.items():
+                if not state.requests:
+                    continue
+                seconds = state.last_finished - state.first_started
+                report.append(HostThroughput(
+                    host,
+                    state.requests,
+                    round(seconds, 3),
+                    round(state.requests / seconds, 1) if seconds else None,
+                    int(state.concurrency),
+                    state.rate and round(state.rate, 2),
+                    state.slowdowns
+                ))
+            return report
+
+    def reset_stats(self):
+        with self.condition:
+            for state in self.hosts.values():
+                state.requests = 0
+                state.slowdowns = 0
+                state.first_started = None
+                state.last_finished = None
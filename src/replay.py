@@ -0,0 +1,43 @@
+from io import BytesIO
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from archive import ArchiveReader
+
+NOT_IN_ARCHIVE_EXCEPTION = 'Ответа на {url} нет в архиве {path}'
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Транспорт, отвечающий на запросы из архива вместо сети.
+
+    Ответа, которого нет в архиве, выбрасывается встроенный
+    ConnectionError: такие запросы не повторяются и не размыкают цепь
+    для хоста, а в режимах считаются ссылками, которые не удалось
+    загрузить.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = ArchiveReader(path)
+
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        record = self.archive.get(request.url)
+        if record is None:
+            raise ConnectionError(NOT_IN_ARCHIVE_EXCEPTION.format(
+                url=request.url, path=self.archive.path
+            ))
+        meta, body = record
+        return self.build_response(request, HTTPResponse(
+            body=BytesIO(body),
+            headers={**meta['headers'], 'Content-Length': str(len(body))},
+            status=meta['status'],
+            reason=meta['reason'],
+            preload_content=False,
+            decode_content=False
+        ))
+
+    def close(self):
+        super().close()
+        self.archive.close()
@@ -0,0 +1,180 @@
+from collections import Counter
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+CIRCUIT_OPEN_EXCEPTION = (
+    'Запросы к {host} временно приостановлены после {failures} '
+    'неудачных попыток подряд'
+)
+
+
+def parse_retry_after(value):
+    """Переводит заголовок Retry-After в секунды ожидания."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """Повторяет неудачные запросы и размыкает цепь для сбоящих хостов.
+
+    Повторяются ошибки соединения, таймауты и ответы с кодами из
+    RETRY_STATUSES. Пауза перед повтором растёт экспоненциально
+    со случайным разбросом (full jitter), а Retry-After сервера
+    соблюдается, если он больше. После failure_threshold неудач
+    подряд запросы к хосту ждут: через reset_after секунд пропускается
+    один пробный запрос. Удачный ответ замыкает цепь, и ожидавшие
+    запросы продолжаются; после неудачного они отклоняются.
+    """
+
+    def __init__(
+        self, retries=2, backoff=0.5, max_backoff=30, timeout=30,
+        failure_threshold=5, reset_after=30
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = Counter()
+        self.opened_at = {}
+        # Поток, выполняющий пробный запрос к хосту, и число
+        # завершённых пробных запросов.
+        self.trials = {}
+        self.trials_done = Counter()
+        self.retried = Counter()
+        self.failed = []
+        self.lock = threading.Lock()
+        self.circuit_changed = threading.Condition(self.lock)
+
+    def delay(self, attempt, retry_after=None):
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt)
+        )
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def allow(self, host):
+        """Ждёт, пока цепь хоста замкнётся или подойдёт время пробного
+        запроса. Возвращает False, если дождавшийся пробный запрос
+        не удался."""
+        with self.circuit_changed:
+            trials_seen = self.trials_done[host]
+            while host in self.opened_at:
+                if self.trials_done[host] != trials_seen:
+                    return False
+                if host in self.trials:
+                    self.circuit_changed.wait()
+                    continue
+                remaining = (
+                    self.opened_at[host] + self.reset_after - time.monotonic()
+                )
+                if remaining <= 0:
+                    self.trials[host] = threading.get_ident()
+                    return True
+                self.circuit_changed.wait(remaining)
+            return True
+
+    def end_trial(self, host):
+        if self.trials.get(host) == threading.get_ident():
+            del self.trials[host]
+            self.trials_done[host] += 1
+            self.circuit_changed.notify_all()
+
+    def record(self, host, success):
+        with self.circuit_changed:
+            if success:
+                self.failures.pop(host, None)
+                if self.opened_at.pop(host, None) is not None:
+                    self.circuit_changed.notify_all()
+            else:
+                self.failures[host] += 1
+                if self.failures[host] >= self.failure_threshold:
+                    self.opened_at[host] = time.monotonic()
+            self.end_trial(host)
+
+    def is_open(self, host):
+        with self.lock:
+            return host in self.opened_at
+
+    def send(self, host, request):
+        """Выполняет одну попытку и возвращает удачный ответ или None,
+        неудачу и паузу из Retry-After."""
+        from requests import RequestException
+
+        try:
+            response = request(self.timeout)
+        except RequestException as error:
+            self.record(host, success=False)
+            return None, error, None
+        except BaseException:
+            with self.lock:
+                self.end_trial(host)
+            raise
+        if response.status_code not in RETRY_STATUSES:
+            self.record(host, success=True)
+            return response, None, None
+        self.record(host, success=False)
+        return None, response, parse_retry_after(
+            response.headers.get('Retry-After')
+        )
+
+    def call(self, url, request):
+        """Выполняет request(timeout) с повторами.
+
+        Возвращает удачный ответ; если попытки кончились, выбрасывает
+        последнюю ошибку requests, для ответа с кодом ошибки —
+        HTTPError. Если к этому моменту цепь хоста разомкнута, запрос
+        дожидается пробного и повторяется ещё раз: короткий сбой
+        хоста не должен терять страницы.
+        """
+        from requests import RequestException
+
+        host = urlsplit(url).netloc
+        attempts = self.retries + 1
+        attempt = 0
+        while True:
+            if not self.allow(host):
+                self.give_up(url)
+                raise ConnectionError(CIRCUIT_OPEN_EXCEPTION.format(
+                    host=host, failures=self.failures[host]
+                ))
+            response, failure, retry_after = self.send(host, request)
+            if response is not None:
+                return response
+            attempt += 1
+            if attempt > attempts or (
+                attempt == attempts and not self.is_open(host)
+            ):
+                break
+            with self.lock:
+                self.retried[url] += 1
+            if attempt < attempts:
+                time.sleep(self.delay(attempt - 1, retry_after))
+        self.give_up(url)
+        if isinstance(failure, RequestException):
+            raise failure
+        failure.raise_for_status()
+
+    def give_up(self, url):
+        with self.lock:
+            self.failed.append(url)
+
+    def reset_stats(self):
+        with self.lock:
+            self.retried.clear()
+            self.failed.clear()
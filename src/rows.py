@@ -0,0 +1,47 @@
+"""Типы строк результатов по режимам.
+
+Строки — именованные кортежи: поля доступны по именам, а памяти они
+занимают ненамного больше обычных кортежей (80 байт против 72 на строку
+из трёх полей в benchmarks/bench_rows.py) и заметно меньше словарей
+и экземпляров обычных классов. Первой строкой режим
+отдаёт схему — кортеж названий колонок с типами значений в атрибуте
+types, поэтому выводам не нужно угадывать типы по данным.
+"""
+from collections import namedtuple
+
+from constants import (
+    LINK_TITLE_AUTHOR_HEAD,
+    LINK_VERSION_STATUS_HEAD,
+    MISMATCH_HEAD,
+    STATUS_NUMBERS_HEAD,
+    TYPE_STATUS_HEAD
+)
+
+
+class Schema(tuple):
+    """Заголовок результата: названия колонок и типы их значений."""
+
+    def __new__(cls, names, types):
+        schema = super().__new__(cls, names)
+        if len(types) != len(schema):
+            raise ValueError(types)
+        schema.types = tuple(types)
+        return schema
+
+    def __reduce__(self):
+        return type(self), (tuple(self), self.types)
+
+
+WhatsNewRow = namedtuple('WhatsNewRow', ('link', 'title', 'author'))
+VersionRow = namedtuple('VersionRow', ('link', 'version', 'status'))
+PepStatusRow = namedtuple('PepStatusRow', ('status', 'count'))
+MismatchRow = namedtuple(
+    'MismatchRow', ('list_status', 'page_status', 'count')
+)
+TypeStatusRow = namedtuple('TypeStatusRow', ('type', 'status', 'count'))
+
+WHATS_NEW_SCHEMA = Schema(LINK_TITLE_AUTHOR_HEAD, (str, str, str))
+VERSION_SCHEMA = Schema(LINK_VERSION_STATUS_HEAD, (str, str, str))
+PEP_STATUS_SCHEMA = Schema(STATUS_NUMBERS_HEAD, (str, int))
+MISMATCH_SCHEMA = Schema(MISMATCH_HEAD, (str, str, int))
+TYPE_STATUS_SCHEMA = Schema(TYPE_STATUS_HEAD, (str, str, int))
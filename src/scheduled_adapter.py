@@ -0,0 +1,24 @@
+from requests.adapters import HTTPAdapter
+
+
+class ScheduledAdapter(HTTPAdapter):
+    """Транспорт, пропускающий запросы через AdaptiveScheduler.
+
+    До адаптера доходят только запросы в сеть, включая условные:
+    ответы из кеша requests_cache отдаёт раньше, поэтому планировщик
+    их не ждёт и не учитывает.
+    """
+
+    def __init__(self, scheduler, **kwargs):
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+
+    def send(self, request, **kwargs):
+        started = self.scheduler.acquire(request.url)
+        status = None
+        try:
+            response = super().send(request, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            self.scheduler.release(request.url, started, status)
@@ -0,0 +1,427 @@
+"""Хранилище кеша requests_cache в сжатом файле сегмента.
+
+Ответы дописываются в конец файла сегмента (<имя>.seg) записями
+
+    длина ключа, длина значения (>HI), ключ, значение
+
+где значение — сериализованный ответ, сжатый zlib с общим словарём
+(<имя>.zdict). Страницы одного сайта похожи друг на друга, поэтому
+словарь из уже сохранённых ответов заметно улучшает сжатие небольших
+страниц. Словарь выбирается по образцам, когда в хранилище набирается
+ZDICT_SAMPLES ответов, и заново при vacuum(); если на образцах он
+не окупает своего размера, ответы сжимаются без словаря. Удаление
+записывается как запись без значения.
+
+Файл читается через mmap, индекс {ключ: (смещение, длина)} хранится
+в памяти в порядке последнего обращения и сохраняется в <имя>.idx
+при закрытии вместе с длиной сегмента, которую он покрывает. Записи,
+дописанные после сохранения индекса, при открытии дочитываются
+из сегмента, а без индекса он восстанавливается целиком.
+
+Суммарный размер живых записей ограничен max_bytes: давно
+не использованные записи вытесняются. Место вытесненных и перезаписанных
+ответов освобождает vacuum().
+
+Одним хранилищем могут пользоваться несколько процессов, например
+--watch и запуск по расписанию. Запись, сохранение индекса и vacuum()
+выполняются под блокировкой fcntl.flock файла <имя>.lock; перед ними
+хранилище дочитывает записи других процессов и открывает сегмент
+заново, если его заменил vacuum() другого процесса.
+"""
+from contextlib import contextmanager
+import json
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+import zlib
+
+from requests_cache.backends import BaseCache, BaseStorage
+from requests_cache.backends.sqlite import SQLiteDict
+
+try:
+    import fcntl
+except ImportError:
+    # В Windows нет flock: процессы не должны делить одно хранилище.
+    fcntl = None
+
+MAGIC = b'PEPSEG1\n'
+RECORD_HEADER = struct.Struct('>HI')
+TOMBSTONE = 0xFFFFFFFF
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Окно zlib — 32 КиБ, более длинный словарь бесполезен.
+ZDICT_SIZE = 32 * 1024
+ZDICT_SAMPLES = 32
+ZDICT_CANDIDATES = 4
+COMPRESSION_LEVEL = 6
+
+
+def compress(data, zdict):
+    if zdict is None:
+        return zlib.compress(data, COMPRESSION_LEVEL)
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data, zdict):
+    if zdict is None:
+        return zlib.decompress(data)
+    decompressor = zlib.decompressobj(zdict=zdict)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def build_zdict(samples, records, current=None):
+    """Выбирает словарь для records ответов по образцам samples.
+
+    Кандидаты — концы нескольких образцов и текущий словарь current;
+    каждый конец проверяется на остальных образцах, иначе он сжимал бы
+    сам себя. Возвращает лучший словарь или None, если ожидаемая
+    экономия на records ответах меньше размера словаря.
+    """
+    if len(samples) < 2:
+        return None
+    plain = [len(compress(sample, None)) for sample in samples]
+    step = max(1, len(samples) // ZDICT_CANDIDATES)
+    candidates = [
+        (samples[number][-ZDICT_SIZE:], number)
+        for number in range(0, len(samples), step)
+    ][:ZDICT_CANDIDATES]
+    if current is not None:
+        candidates.append((current, None))
+    best, best_saving = None, 0
+    for zdict, own_number in candidates:
+        checked = [
+            number for number in range(len(samples)) if number != own_number
+        ]
+        saving = sum(
+            plain[number] - len(compress(samples[number], zdict))
+            for number in checked
+        ) / len(checked) * records - len(zdict)
+        if saving > best_saving:
+            best, best_saving = zdict, saving
+    return best
+
+
+def write_record(file, key, value=None):
+    """Дописывает запись и возвращает смещение её значения."""
+    key_bytes = key.encode('utf-8')
+    value_offset = file.tell() + RECORD_HEADER.size + len(key_bytes)
+    file.write(RECORD_HEADER.pack(
+        len(key_bytes), TOMBSTONE if value is None else len(value)
+    ))
+    file.write(key_bytes)
+    if value is not None:
+        file.write(value)
+    return value_offset
+
+
+class SegmentStorage(BaseStorage):
+    """Словарь ответов в файле сегмента с вытеснением по LRU."""
+
+    def __init__(
+        self, path, max_bytes=DEFAULT_MAX_BYTES, serializer='pickle',
+        decode_content=False, **kwargs
+    ):
+        super().__init__(
+            serializer=serializer, decode_content=decode_content, **kwargs
+        )
+        path = Path(path)
+        self.segment_path = path.with_name(path.name + '.seg')
+        self.index_path = path.with_name(path.name + '.idx')
+        self.zdict_path = path.with_name(path.name + '.zdict')
+        self.max_bytes = max_bytes
+        self.train_at = ZDICT_SAMPLES
+        self.lock = threading.RLock()
+        self.lock_depth = 0
+        # Файл блокировки не заменяется при vacuum, в отличие от сегмента.
+        self.lock_file = open(path.with_name(path.name + '.lock'), 'ab')
+        self.open()
+
+    @contextmanager
+    def file_lock(self):
+        """Блокировка хранилища от других потоков и процессов;
+        вложенные блокировки в одном потоке допустимы."""
+        with self.lock:
+            if self.lock_depth == 0 and fcntl is not None:
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            self.lock_depth += 1
+            try:
+                yield
+            finally:
+                self.lock_depth -= 1
+                if self.lock_depth == 0 and fcntl is not None:
+                    fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def open(self):
+        with self.file_lock():
+            if not self.segment_path.exists():
+                self.segment_path.write_bytes(MAGIC)
+                self.index_path.unlink(missing_ok=True)
+                self.zdict_path.unlink(missing_ok=True)
+            self.zdict = self.load_zdict()
+            self.file = open(self.segment_path, 'r+b')
+            self.map = mmap.mmap(
+                self.file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+            self.index, indexed_size = self.load_index()
+            self.live_bytes = sum(
+                length for _, length in self.index.values()
+            )
+            self.end = self.scan(indexed_size)
+            self.drop_torn_record()
+
+    def load_zdict(self):
+        if not self.zdict_path.exists():
+            return None
+        return self.zdict_path.read_bytes()
+
+    def save_zdict(self, zdict):
+        if zdict is None:
+            self.zdict_path.unlink(missing_ok=True)
+            return
+        temp_path = self.zdict_path.with_name(self.zdict_path.name + '.tmp')
+        temp_path.write_bytes(zdict)
+        os.replace(temp_path, self.zdict_path)
+
+    def drop_torn_record(self):
+        if self.end < len(self.map):
+            # Оборванная последняя запись отбрасывается, чтобы следующие
+            # дописывались после целых записей.
+            self.file.truncate(self.end)
+            self.remap()
+        self.file.seek(self.end)
+
+    def load_index(self):
+        try:
+            saved = json.loads(self.index_path.read_bytes())
+            indexed_size = saved['segment_size']
+            entries = saved['entries']
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}, len(MAGIC)
+        if indexed_size > len(self.map):
+            return {}, len(MAGIC)
+        return {key: (offset, length) for key, offset, length in entries}, (
+            indexed_size
+        )
+
+    def scan(self, offset):
+        """Дочитывает индекс из записей сегмента начиная с offset
+        и возвращает конец последней целой записи."""
+        data = self.map
+        while offset + RECORD_HEADER.size <= len(data):
+            key_length, value_length = RECORD_HEADER.unpack_from(data, offset)
+            key_start = offset + RECORD_HEADER.size
+            value_start = key_start + key_length
+            end = value_start + (
+                0 if value_length == TOMBSTONE else value_length
+            )
+            if end > len(data):
+                break
+            key = data[key_start:value_start].decode('utf-8')
+            self.discard(key)
+            if value_length != TOMBSTONE:
+                self.index[key] = (value_start, value_length)
+                self.live_bytes += value_length
+            offset = end
+        return offset
+
+    def is_replaced(self):
+        try:
+            return (
+                os.stat(self.segment_path).st_ino
+                != os.fstat(self.file.fileno()).st_ino
+            )
+        except FileNotFoundError:
+            return True
+
+    def catch_up(self):
+        """Учитывает изменения хранилища другими процессами; вызывается
+        под file_lock перед записью."""
+        if self.is_replaced():
+            self.map.close()
+            self.file.close()
+            self.open()
+            return
+        if os.fstat(self.file.fileno()).st_size > self.end:
+            self.remap()
+            self.end = self.scan(self.end)
+            self.drop_torn_record()
+        if self.zdict is None:
+            self.zdict = self.load_zdict()
+
+    def save_index(self):
+        temp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+        temp_path.write_text(json.dumps({
+            'segment_size': self.end,
+            'entries': [
+                (key, offset, length)
+                for key, (offset, length) in self.index.items()
+            ],
+        }), encoding='utf-8')
+        os.replace(temp_path, self.index_path)
+
+    def remap(self):
+        """Отображает файл заново, чтобы увидеть дописанные записи."""
+        self.map.close()
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, offset, length):
+        if offset + length > len(self.map):
+            self.remap()
+        return decompress(self.map[offset:offset + length], self.zdict)
+
+    def append(self, key, value=None):
+        """Дописывает запись; вызывается под file_lock после catch_up."""
+        offset = write_record(self.file, key, value)
+        self.file.flush()
+        self.end = self.file.tell()
+        return offset
+
+    def samples(self):
+        """Несжатые ответы, равномерно выбранные из хранилища."""
+        keys = list(self.index)
+        samples = []
+        for key in keys[::max(1, len(keys) // ZDICT_SAMPLES)]:
+            try:
+                samples.append(self.read(*self.index[key]))
+            except zlib.error:
+                continue
+        return samples[:ZDICT_SAMPLES]
+
+    def train_zdict(self):
+        """Выбирает словарь, когда набралось достаточно ответов.
+        Уже сохранённые ответы остаются сжатыми без словаря."""
+        if self.zdict is not None or len(self.index) < self.train_at:
+            return
+        self.zdict = build_zdict(self.samples(), len(self.index))
+        self.save_zdict(self.zdict)
+        # Не окупившийся словарь пробуется снова на вдвое большем числе
+        # ответов.
+        self.train_at = 2 * len(self.index)
+
+    def __getitem__(self, key):
+        with self.lock:
+            offset, length = self.index[key]
+            self.index[key] = self.index.pop(key)
+            try:
+                data = self.read(offset, length)
+            except zlib.error:
+                # Повреждённая запись считается промахом кеша.
+                raise KeyError(key)
+        return self.deserialize(key, data)
+
+    def __setitem__(self, key, value):
+        data = self.serialize(value)
+        with self.file_lock():
+            self.catch_up()
+            self.train_zdict()
+            value = compress(data, self.zdict)
+            self.discard(key)
+            self.index[key] = (self.append(key, value), len(value))
+            self.live_bytes += len(value)
+            while self.live_bytes > self.max_bytes and len(self.index) > 1:
+                self.delete(next(iter(self.index)))
+
+    def __delitem__(self, key):
+        with self.file_lock():
+            self.catch_up()
+            if key not in self.index:
+                raise KeyError(key)
+            self.delete(key)
+
+    def discard(self, key):
+        if key in self.index:
+            self.live_bytes -= self.index.pop(key)[1]
+
+    def delete(self, key):
+        self.discard(key)
+        self.append(key)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.index))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def size(self):
+        """Размер файлов хранилища на диске, байт."""
+        return sum(
+            path.stat().st_size
+            for path in (self.segment_path, self.index_path, self.zdict_path)
+            if path.exists()
+        )
+
+    def vacuum(self):
+        """Переписывает сегмент только с живыми записями, сохраняя
+        порядок обращений, и заново выбирает словарь по образцам.
+        Записи пересжимаются: сохранённые до выбора словаря сжаты
+        без него."""
+        with self.file_lock():
+            self.catch_up()
+            self.remap()
+            zdict = build_zdict(self.samples(), len(self.index), self.zdict)
+            temp_path = self.segment_path.with_name(
+                self.segment_path.name + '.tmp'
+            )
+            with open(temp_path, 'wb') as segment:
+                segment.write(MAGIC)
+                for key, (offset, length) in self.index.items():
+                    try:
+                        data = self.read(offset, length)
+                    except zlib.error:
+                        continue
+                    write_record(segment, key, compress(data, zdict))
+            self.map.close()
+            self.file.close()
+            # Индекс старого сегмента к новому не подходит.
+            self.index_path.unlink(missing_ok=True)
+            self.save_zdict(zdict)
+            os.replace(temp_path, self.segment_path)
+            self.open()
+            self.save_index()
+
+    def clear(self):
+        with self.file_lock():
+            self.map.close()
+            self.file.close()
+            for path in (self.segment_path, self.index_path, self.zdict_path):
+                path.unlink(missing_ok=True)
+            self.open()
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            with self.file_lock():
+                self.catch_up()
+                self.save_index()
+                self.map.close()
+                self.file.close()
+            self.lock_file.close()
+
+
+class SegmentCache(BaseCache):
+    """Кеш requests_cache с ответами в SegmentStorage. Перенаправления
+    занимают мало места и хранятся в SQLite, как в файловом бэкенде
+    requests_cache."""
+
+    def __init__(
+        self, cache_name='http_cache', max_bytes=DEFAULT_MAX_BYTES,
+        serializer=None, **kwargs
+    ):
+        super().__init__(cache_name=str(cache_name), **kwargs)
+        storage_kwargs = (
+            {'serializer': serializer, **kwargs} if serializer else kwargs
+        )
+        self.responses = SegmentStorage(
+            cache_name, max_bytes=max_bytes, **storage_kwargs
+        )
+        self.redirects = SQLiteDict(
+            f'{cache_name}.redirects.sqlite', 'redirects',
+            serializer=None, **kwargs
+        )
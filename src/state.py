@@ -0,0 +1,50 @@
+"""Хранилище состояния PEP между запусками парсера.
+
+Для каждой ссылки на PEP хранится отпечаток строки из общего списка,
+статус из списка, статус со страницы и отпечаток самой страницы.
+"""
+from contextlib import closing
+import sqlite3
+
+CREATE_TABLE_SQL = (
+    'CREATE TABLE IF NOT EXISTS pep_state ('
+    'link TEXT PRIMARY KEY, '
+    'row_fingerprint TEXT NOT NULL, '
+    'list_status TEXT NOT NULL, '
+    'page_status TEXT NOT NULL, '
+    'page_fingerprint TEXT NOT NULL, '
+    'updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+)
+SELECT_SQL = (
+    'SELECT link, row_fingerprint, list_status, page_status, '
+    'page_fingerprint FROM pep_state'
+)
+UPSERT_SQL = (
+    'INSERT OR REPLACE INTO pep_state '
+    '(link, row_fingerprint, list_status, page_status, page_fingerprint) '
+    'VALUES (?, ?, ?, ?, ?)'
+)
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute(CREATE_TABLE_SQL)
+    return connection
+
+
+def load_pep_state(path):
+    """Возвращает словарь {ссылка: (отпечаток строки, статус из списка,
+    статус со страницы, отпечаток страницы)}."""
+    with closing(connect(path)) as connection:
+        return {
+            link: tuple(record)
+            for link, *record in connection.execute(SELECT_SQL)
+        }
+
+
+def save_pep_state(path, records):
+    with closing(connect(path)) as connection, connection:
+        connection.executemany(
+            UPSERT_SQL,
+            ((link, *record) for link, record in records.items())
+        )
@@ -1,8 +1,11 @@
-from requests import RequestException
-
-from bs4 import BeautifulSoup
+from concurrent.futures import Future
+from functools import partial, wraps
+import hashlib
+import json
+import threading
 
 from exceptions import ParserFindTagException
+from profiling import profiled
 
 
 REQUEST_EXCEPTION = (
@@ -10,12 +13,102 @@ REQUEST_EXCEPTION = (
     'загрузке страницы {url}: {error}'
 )
 FIND_TAG_EXCEPTION = 'Не найден тег {tag} {attrs}'
+FIND_NODE_EXCEPTION = 'Не найден элемент {xpath}'
+
+CACHE_HIT = 'hit'
+CACHE_MISS = 'miss'
+CACHE_REVALIDATED = 'revalidated'
+# Ответ взят у одновременного запроса того же url из другого потока.
+CACHE_SHARED = 'shared'
+
+cache_stats_lock = threading.Lock()
+in_flight_lock = threading.Lock()
+
+
+def count_shared_result(session):
+    cache_stats = getattr(session, 'cache_stats', None)
+    if cache_stats is not None:
+        with cache_stats_lock:
+            cache_stats[CACHE_SHARED] += 1
+
 
+def count_cache_result(session, response):
+    cache_stats = getattr(session, 'cache_stats', None)
+    if cache_stats is None:
+        return
+    if not getattr(response, 'from_cache', False):
+        result = CACHE_MISS
+    elif getattr(response, 'revalidated', False):
+        result = CACHE_REVALIDATED
+    else:
+        result = CACHE_HIT
+    with cache_stats_lock:
+        cache_stats[result] += 1
 
+
+def response_source(response):
+    return 'cache' if getattr(response, 'from_cache', False) else 'network'
+
+
+@profiled('get_response', size=lambda response: len(response.content))
 def get_response(session, url, encode='utf-8'):
+    """Загружает страницу через сессию.
+
+    Если у сессии есть словарь in_flight, одновременные запросы одного
+    url выполняются один раз: остальные потоки ждут и получают тот же
+    ответ или ту же ошибку.
+    """
+    in_flight = getattr(session, 'in_flight', None)
+    if in_flight is None:
+        return fetch_response(session, url, encode)
+    key = (url, encode)
+    with in_flight_lock:
+        shared = in_flight.get(key)
+        if shared is None:
+            shared = in_flight[key] = Future()
+            owner = True
+        else:
+            owner = False
+    if not owner:
+        count_shared_result(session)
+        return shared.result()
+    try:
+        response = fetch_response(session, url, encode)
+    except Exception as error:
+        shared.set_exception(error)
+        raise
+    else:
+        shared.set_result(response)
+        return response
+    finally:
+        with in_flight_lock:
+            del in_flight[key]
+
+
+# Источник ответа учитывается здесь, а не в get_response: ответ,
+# полученный от одновременного запроса того же url, иначе считался бы
+# загруженным из сети ещё раз для каждого ждавшего потока.
+@profiled(
+    'fetch_response',
+    size=lambda response: len(response.content),
+    kind=response_source
+)
+def fetch_response(session, url, encode):
+    from requests import RequestException
+
+    retry_policy = getattr(session, 'retry_policy', None)
     try:
-        response = session.get(url)
+        if retry_policy is None:
+            response = send_request(session, url)
+        else:
+            response = retry_policy.call(
+                url, partial(send_request, session, url)
+            )
         response.encoding = encode
+        count_cache_result(session, response)
+        recorder = getattr(session, 'recorder', None)
+        if recorder is not None:
+            recorder.add(url, response)
         return response
     except RequestException as error:
         raise ConnectionError(
@@ -26,6 +119,44 @@ def get_response(session, url, encode='utf-8'):
         )
 
 
+def send_request(session, url, timeout=None):
+    """Отправляет запрос через сессию. Планировщик запросов
+    к хостам подключён к сессии как транспорт и видит только
+    запросы в сеть."""
+    if timeout is None:
+        return session.get(url)
+    return session.get(url, timeout=timeout)
+
+
+def rows_list(generator_function):
+    """Превращает генератор строк результата в функцию, которая
+    возвращает список. Сам генератор доступен как атрибут stream —
+    через него строки можно выводить по мере получения."""
+    @wraps(generator_function)
+    def collect_rows(*args, **kwargs):
+        return list(generator_function(*args, **kwargs))
+    collect_rows.stream = generator_function
+    return collect_rows
+
+
+def is_cache_fresh(session, url):
+    """Есть ли в кеше сессии непросроченный ответ для url."""
+    from requests import Request
+
+    cache = getattr(session, 'cache', None)
+    if cache is None:
+        return False
+    response = cache.get_response(
+        cache.create_key(Request('GET', url).prepare())
+    )
+    return response is not None and not response.is_expired
+
+
+def fingerprint(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+@profiled('find_tag')
 def find_tag(soup, tag, attrs=None):
     searched_tag = soup.find(
         tag, attrs=(
@@ -42,7 +173,63 @@ def find_tag(soup, tag, attrs=None):
     return searched_tag
 
 
-def get_soup(session, url, features='lxml'):
+@profiled('make_soup')
+def make_soup(text, features='lxml', parse_only=None):
+    """Строит дерево страницы.
+
+    parse_only — словарь с аргументами SoupStrainer: если он задан,
+    строится только описанная им часть документа.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
     return BeautifulSoup(
-        get_response(session, url).text, features=features
+        text,
+        features=features,
+        parse_only=(
+            SoupStrainer(**parse_only) if parse_only is not None else None
+        )
     )
+
+
+@profiled('get_soup')
+def get_soup(session, url, features='lxml', parse_only=None):
+    """Загружает и разбирает страницу.
+
+    Если у сессии есть soup_memo, дерево берётся из него по url,
+    параметрам разбора и хешу содержимого: неизменившаяся страница
+    повторно не разбирается.
+    """
+    response = get_response(session, url)
+    soup_memo = getattr(session, 'soup_memo', None)
+    if soup_memo is None:
+        return make_soup(
+            response.text, features=features, parse_only=parse_only
+        )
+    return soup_memo.get(
+        (
+            url,
+            features,
+            json.dumps(parse_only, sort_keys=True),
+            hashlib.sha1(response.content).hexdigest()
+        ),
+        len(response.content),
+        partial(
+            make_soup, response.text, features=features, parse_only=parse_only
+        )
+    )
+
+
+@profiled('make_tree')
+def make_tree(text):
+    from lxml import html as lxml_html
+
+    return lxml_html.document_fromstring(text)
+
+
+def find_node(tree, xpath):
+    nodes = tree.xpath(xpath)
+    if not nodes:
+        raise ParserFindTagException(
+            FIND_NODE_EXCEPTION.format(xpath=xpath)
+        )
+    return nodes[0]
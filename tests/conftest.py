@@ -1,5 +1,12 @@
+import io
+import os
 import pytest
+import re
 import sys
+import threading
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from bs4 import BeautifulSoup
 import requests_mock
@@ -16,6 +23,7 @@ sys.path.append(str(SRC_DIR))
 
 MAIN_DOC_URL = 'https://docs.python.org/3/'
 PEP_URL = 'https://www.python.org/dev/peps/'
+SITE_DIR = BASE_DIR / 'tests' / 'fixture_data' / 'site'
 
 
 precode_files = ['constants.py', 'main.py', 'utils.py']
@@ -87,6 +95,82 @@ def soup(response_page):
     return BeautifulSoup(response, features='lxml')
 
 
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler with ETag and single `Range: bytes=` support."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            return super().send_head()
+        stat = os.stat(path)
+        self.etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        match = re.fullmatch(
+            r'bytes=(\d+)-(\d*)', self.headers.get('Range', '')
+        )
+        if_range = self.headers.get('If-Range')
+        if match is None or if_range not in (None, self.etag):
+            return super().send_head()
+        start = int(match.group(1))
+        if start >= stat.st_size:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{stat.st_size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return io.BytesIO(b'')
+        end = min(int(match.group(2) or stat.st_size - 1), stat.st_size - 1)
+        with open(path, 'rb') as file:
+            file.seek(start)
+            body = file.read(end - start + 1)
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header(
+            'Content-Range', f'bytes {start}-{end}/{stat.st_size}'
+        )
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def end_headers(self):
+        self.send_header('Accept-Ranges', 'bytes')
+        if getattr(self, 'etag', None):
+            self.send_header('ETag', self.etag)
+        super().end_headers()
+
+
+@contextmanager
+def serve_directory(directory):
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', 0), partial(QuietHandler, directory=str(directory))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}/'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def site_server():
+    """Local stand-in for docs.python.org and peps.python.org."""
+    with serve_directory(SITE_DIR) as url:
+        yield url
+
+
+@pytest.fixture
+def site_main(monkeypatch, site_server):
+    """`main` module whose URLs point to the local stand-in server."""
+    monkeypatch.setattr(main, 'MAIN_PEP_URL', site_server)
+    monkeypatch.setattr(main, 'MAIN_DOC_URL', site_server + '3/')
+    monkeypatch.setattr(main, 'WHATS_NEW_URL', site_server + '3/whatsnew/')
+    monkeypatch.setattr(main, 'DOWNLOADS_URL', site_server + '3/download.html')
+    return main
+
+
 @pytest.fixture
 def pep_namespace():
     return Namespace(mode='pep', clear_cache=False, output='file')
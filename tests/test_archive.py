@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src import archive
+
+
+def fake_response(content, status_code=200):
+    return SimpleNamespace(
+        status_code=status_code,
+        reason='OK',
+        headers={'Content-Type': 'text/html', 'Content-Encoding': 'gzip'},
+        content=content
+    )
+
+
+def test_archive_round_trip(tmp_path):
+    path = tmp_path / 'pages.arc'
+    writer = archive.ArchiveWriter(path)
+    writer.add('https://peps.python.org/', fake_response(b'index' * 100))
+    writer.add('https://peps.python.org/pep-0008/', fake_response(b'pep 8'))
+    writer.add('https://peps.python.org/', fake_response(b'skipped'))
+    writer.close()
+    reader = archive.ArchiveReader(path)
+    meta, body = reader.get('https://peps.python.org/')
+    assert body == b'index' * 100
+    assert meta['headers'] == {'Content-Type': 'text/html'}
+    assert len(reader) == 2
+    assert reader.get('https://peps.python.org/pep-0020/') is None
+    reader.close()
+
+
+def test_archive_index_is_rebuilt_after_interrupted_recording(tmp_path):
+    path = tmp_path / 'pages.arc'
+    writer = archive.ArchiveWriter(path)
+    writer.add('https://peps.python.org/', fake_response(b'index'))
+    writer.add('https://peps.python.org/pep-0008/', fake_response(b'pep 8'))
+    writer.file.flush()
+    reader = archive.ArchiveReader(path)
+    assert reader.get('https://peps.python.org/pep-0008/')[1] == b'pep 8'
+    reader.close()
+    writer.close()
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'pages.arc'
+    path.write_bytes(b'not an archive')
+    with pytest.raises(ValueError):
+        archive.ArchiveReader(path)
+
+
+def test_replay_serves_recorded_run(site_main, tmp_path):
+    path = str(tmp_path / 'pages.arc')
+    parser = site_main.configure_argument_parser(
+        site_main.MODE_TO_FUNCTION.keys()
+    )
+    record_args = parser.parse_args(['pep', '--record', path])
+    record_session = site_main.configure_session(
+        record_args, backend='memory'
+    )
+    with archive.recording(record_session):
+        recorded = site_main.pep(record_session, record_args)
+
+    replay_args = parser.parse_args(['pep', '--replay', path])
+    replay_session = site_main.configure_session(replay_args)
+    assert site_main.pep(replay_session, replay_args) == recorded
+    with pytest.raises(ConnectionError):
+        replay_session.get(site_main.MAIN_DOC_URL)
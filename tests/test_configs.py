@@ -29,7 +29,7 @@ def test_configs_file():
     ),
     (
         argparse._StoreAction, ['-o', '--output'], 'output',
-        ('pretty', 'file'),
+        ('pretty', 'file', 'jsonl', 'columnar', 'sqlite'),
         'Дополнительные способы вывода данных'
     ),
 ])
@@ -64,3 +64,26 @@ def test_configure_argument_parser(
     assert got_action.help == help_str, (
         f'Укажите help-строку cli аргумента {got_action.dest}'
     )
+
+
+def test_configure_session_revalidates(site_server):
+    session = configs.configure_session(
+        argparse.Namespace(clear_cache=False, workers=1),
+        backend='memory',
+        expire_after=0
+    )
+    from src import utils
+    for _ in range(3):
+        utils.get_response(session, site_server + 'pep-0008/')
+    assert session.cache_stats == {'miss': 1, 'revalidated': 2}
+
+
+def test_urls_expire_after_order():
+    got = configs.get_urls_expire_after(
+        argparse.Namespace(index_expire_after=60, pages_expire_after=3600)
+    )
+    assert list(got.items())[:2] == [
+        ('peps.python.org/pep-*', 3600),
+        ('docs.python.org/3/whatsnew/*', 3600),
+    ]
+    assert got['peps.python.org/'] == 60
@@ -0,0 +1,200 @@
+import shutil
+import zipfile
+
+import pytest
+
+from conftest import SITE_DIR, serve_directory
+try:
+    from src import downloads
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `downloads.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `downloads.py`'
+
+ARCHIVE_NAME = 'python-3.12-docs-pdf-a4.zip'
+OTHER_ARCHIVE_NAMES = (
+    'python-3.12-docs-html.zip',
+    'python-3.12-docs-text.zip',
+    'python-3.12-docs.epub',
+)
+
+
+@pytest.fixture
+def archive_site(tmp_path):
+    site_dir = tmp_path / 'site'
+    archives_dir = site_dir / '3' / 'archives'
+    archives_dir.mkdir(parents=True)
+    shutil.copy(SITE_DIR / '3' / 'download.html', site_dir / '3')
+    for name in (ARCHIVE_NAME, *OTHER_ARCHIVE_NAMES):
+        with zipfile.ZipFile(archives_dir / name, 'w') as archive:
+            for number in range(20):
+                archive.writestr(f'doc-{number}', bytes(range(256)) * 512)
+    with serve_directory(site_dir) as url:
+        yield url, archives_dir / ARCHIVE_NAME
+
+
+def test_download_file(tempfile_session, tmp_path, archive_site):
+    url, source = archive_site
+    path = tmp_path / ARCHIVE_NAME
+    link = url + '3/archives/' + ARCHIVE_NAME
+    assert downloads.download_file(tempfile_session, link, path)
+    assert path.read_bytes() == source.read_bytes()
+    assert not path.with_name(ARCHIVE_NAME + '.part').exists()
+    assert not downloads.download_file(tempfile_session, link, path)
+
+
+def test_download_file_resumes(tempfile_session, tmp_path, archive_site):
+    url, source = archive_site
+    path = tmp_path / ARCHIVE_NAME
+    part_path = path.with_name(ARCHIVE_NAME + '.part')
+    part_path.write_bytes(source.read_bytes()[:1000])
+    downloads.download_file(
+        tempfile_session, url + '3/archives/' + ARCHIVE_NAME, path
+    )
+    assert path.read_bytes() == source.read_bytes()
+
+
+def test_download_file_rejects_broken_part(
+        tempfile_session, tmp_path, archive_site
+):
+    url, source = archive_site
+    path = tmp_path / ARCHIVE_NAME
+    part_path = path.with_name(ARCHIVE_NAME + '.part')
+    part_path.write_bytes(b'x' * 1000)
+    with pytest.raises(
+        (downloads.DownloadIntegrityException, zipfile.BadZipFile)
+    ):
+        downloads.download_file(
+            tempfile_session, url + '3/archives/' + ARCHIVE_NAME, path
+        )
+    assert not part_path.exists()
+    assert not path.exists()
+
+
+@pytest.mark.parametrize('extra', [b'', b'x' * 100])
+def test_download_file_full_size_part(
+        tempfile_session, tmp_path, archive_site, extra
+):
+    url, source = archive_site
+    path = tmp_path / ARCHIVE_NAME
+    part_path = path.with_name(ARCHIVE_NAME + '.part')
+    part_path.write_bytes(source.read_bytes() + extra)
+    assert downloads.download_file(
+        tempfile_session, url + '3/archives/' + ARCHIVE_NAME, path
+    )
+    assert path.read_bytes() == source.read_bytes()
+    assert not part_path.exists()
+
+
+def test_download_file_restarts_zero_filled_part(
+        tempfile_session, tmp_path, archive_site
+):
+    url, source = archive_site
+    name = OTHER_ARCHIVE_NAMES[-1]
+    path = tmp_path / name
+    part_path = path.with_name(name + '.part')
+    part_path.write_bytes(bytes(len((source.parent / name).read_bytes())))
+    link = url + '3/archives/' + name
+    assert downloads.download_file(tempfile_session, link, path)
+    assert path.read_bytes() == (source.parent / name).read_bytes()
+    assert not downloads.download_file(tempfile_session, link, path)
+
+
+def test_failed_segments_leave_no_part(
+        monkeypatch, tempfile_session, tmp_path, archive_site
+):
+    url, source = archive_site
+    path = tmp_path / ARCHIVE_NAME
+    link = url + '3/archives/' + ARCHIVE_NAME
+
+    def broken_segment(*args):
+        raise downloads.DownloadIntegrityException('обрыв')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(downloads, 'download_segment', broken_segment)
+        with pytest.raises(downloads.DownloadIntegrityException):
+            downloads.download_file(tempfile_session, link, path, segments=2)
+    assert list(tmp_path.glob(ARCHIVE_NAME + '*')) == []
+    assert downloads.download_file(tempfile_session, link, path)
+    assert path.read_bytes() == source.read_bytes()
+
+
+def test_stream_to_file_restarts_after_416(tmp_path, archive_site):
+    from requests import Session
+    url, source = archive_site
+    part_path = tmp_path / (ARCHIVE_NAME + '.part')
+    part_path.write_bytes(source.read_bytes() + b'x' * 100)
+    downloads.stream_to_file(
+        Session(), url + '3/archives/' + ARCHIVE_NAME, part_path,
+        size=None, etag=None, accept_ranges=True
+    )
+    assert part_path.read_bytes() == source.read_bytes()
+
+
+def test_download_mode(monkeypatch, tmp_path, tempfile_session, archive_site):
+    from src import main
+    url, source = archive_site
+    monkeypatch.setattr(main, 'BASE_DIR', tmp_path)
+    monkeypatch.setattr(main, 'DOWNLOADS_URL', url + '3/download.html')
+    assert main.download(tempfile_session) is None
+    assert (tmp_path / 'downloads' / ARCHIVE_NAME).exists()
+
+
+def test_download_file_segments(tempfile_session, tmp_path, archive_site):
+    url, source = archive_site
+    path = tmp_path / ARCHIVE_NAME
+    assert downloads.download_file(
+        tempfile_session, url + '3/archives/' + ARCHIVE_NAME, path, segments=4
+    )
+    assert path.read_bytes() == source.read_bytes()
+
+
+def test_download_mode_patterns(
+        monkeypatch, tmp_path, tempfile_session, archive_site
+):
+    from argparse import Namespace
+    from src import main
+    url, source = archive_site
+    monkeypatch.setattr(main, 'BASE_DIR', tmp_path)
+    monkeypatch.setattr(main, 'DOWNLOADS_URL', url + '3/download.html')
+    main.download(
+        tempfile_session,
+        Namespace(
+            archives=['*html.zip', '*text.zip', '*.epub'],
+            workers=3,
+            segments=2,
+            bandwidth_limit=None
+        )
+    )
+    assert sorted(
+        path.name for path in (tmp_path / 'downloads').iterdir()
+        if not path.name.endswith('.etag')
+    ) == sorted(OTHER_ARCHIVE_NAMES)
+
+
+def test_download_files_survives_corrupt_zip(
+        tempfile_session, tmp_path, archive_site
+):
+    url, source = archive_site
+    (source.parent / 'bad.zip').write_bytes(bytes(range(256)) * 40)
+    downloads_dir = tmp_path / 'downloads'
+    downloads_dir.mkdir()
+    links = {
+        url + '3/archives/' + name: downloads_dir / name
+        for name in ('bad.zip', ARCHIVE_NAME)
+    }
+    assert [
+        result for _, result in downloads.download_files(
+            tempfile_session, links, workers=2
+        )
+    ] == [None, True]
+    assert sorted(path.name for path in downloads_dir.iterdir()) == [
+        ARCHIVE_NAME, ARCHIVE_NAME + '.etag'
+    ]
+
+
+def test_bandwidth_limiter():
+    from src import ratelimit
+    limiter = ratelimit.BandwidthLimiter(rate=1000)
+    assert limiter.reserve(500) == 0
+    assert limiter.reserve(500) == pytest.approx(0.5, abs=0.01)
@@ -0,0 +1,69 @@
+from argparse import Namespace
+
+import pytest
+
+try:
+    from src import engines, extractors, ratelimit, utils
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `engines.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `engines.py`'
+
+WHATS_NEW_HEAD = ('Ссылка на статью', 'Заголовок', 'Редактор, автор')
+
+
+def engine_args(workers=4, rate_limit=None, parse_workers=None):
+    return Namespace(
+        workers=workers,
+        rate_limit=rate_limit,
+        parse_workers=parse_workers
+    )
+
+
+def test_crawl_keeps_order_and_reports_bad_links(
+        tempfile_session, site_server
+):
+    urls = [
+        site_server + 'pep-0008/',
+        site_server + 'missing/',
+        site_server + 'pep-0020/',
+    ]
+    got = list(engines.crawl(
+        tempfile_session,
+        urls,
+        lambda html: utils.make_soup(html).h1.text,
+        engine_args()
+    ))
+    assert [url for url, _ in got] == urls
+    assert got[0][1] == 'PEP 8 – Style Guide for Python Code'
+    assert got[2][1] == 'PEP 20 – The Zen of Python'
+
+
+def test_crawl_parse_workers(tempfile_session, site_server):
+    urls = [site_server + 'pep-0401/', site_server + 'pep-3099/']
+    got = list(engines.crawl(
+        tempfile_session,
+        urls,
+        extractors.extract_pep_status,
+        engine_args(parse_workers=2)
+    ))
+    assert got == [(urls[0], 'April Fool!'), (urls[1], 'Final')]
+
+
+def test_whats_new_crawl(tempfile_session, site_main):
+    got = site_main.whats_new(tempfile_session, engine_args())
+    assert got[0] == WHATS_NEW_HEAD
+    assert [title for _, title, _ in got[1:]] == [
+        'What’s New In Python 3.12¶',
+        'What’s New In Python 3.11¶',
+        'What’s New In Python 2.0¶',
+    ]
+
+
+def test_host_rate_limiter():
+    limiter = ratelimit.HostRateLimiter(rate=10)
+    delays = [limiter.reserve('https://peps.python.org/') for _ in range(3)]
+    other_host_delay = limiter.reserve('https://docs.python.org/3/')
+    assert delays[0] == 0
+    assert delays[2] == pytest.approx(0.2, abs=0.01)
+    assert other_host_delay == 0
@@ -0,0 +1,39 @@
+import pytest
+
+from conftest import SITE_DIR
+try:
+    from src import extractors
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `extractors.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `extractors.py`'
+
+
+def read_pages(pattern):
+    return [
+        pytest.param(path.read_text(encoding='utf-8'), id=str(path.parent))
+        for path in sorted(SITE_DIR.glob(pattern))
+    ]
+
+
+@pytest.mark.parametrize('html', read_pages('pep-*/index.html'))
+def test_pep_status_backends_match(html):
+    assert (
+        extractors.PEP_STATUS_EXTRACTORS['lxml'](html)
+        == extractors.PEP_STATUS_EXTRACTORS['bs4'](html)
+    )
+
+
+@pytest.mark.parametrize('html', read_pages('3/whatsnew/[0-9]*.html'))
+def test_whats_new_backends_match(html):
+    assert (
+        extractors.WHATS_NEW_EXTRACTORS['lxml'](html)
+        == extractors.WHATS_NEW_EXTRACTORS['bs4'](html)
+    )
+
+
+@pytest.mark.parametrize('backend', ['bs4', 'lxml'])
+def test_missing_tag_raises(backend):
+    with pytest.raises(BaseException) as excinfo:
+        extractors.WHATS_NEW_EXTRACTORS[backend]('<html><body></body></html>')
+    assert excinfo.typename == 'ParserFindTagException'
@@ -0,0 +1,93 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from src import memo, utils
+
+
+def test_soup_memo_evicts_least_recently_used():
+    soup_memo = memo.SoupMemo(max_entries=2, max_bytes=100)
+    soup_memo.get('a', 10, lambda: 'A')
+    soup_memo.get('b', 10, lambda: 'B')
+    soup_memo.get('a', 10, lambda: 'not parsed')
+    soup_memo.get('c', 10, lambda: 'C')
+    assert list(soup_memo.entries) == ['a', 'c']
+    soup_memo.get('d', 95, lambda: 'D')
+    assert list(soup_memo.entries) == ['d']
+    assert soup_memo.total_bytes == 95
+    assert (soup_memo.hits, soup_memo.misses) == (1, 4)
+
+
+def test_soup_memo_parses_once_for_concurrent_callers():
+    soup_memo = memo.SoupMemo()
+    parses = []
+    lock = threading.Lock()
+
+    def parse():
+        with lock:
+            parses.append(1)
+        time.sleep(0.2)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(
+            lambda _: soup_memo.get('key', 1, parse), range(4)
+        ))
+    assert len(parses) == 1
+    assert len({id(result) for result in results}) == 1
+
+
+def test_soup_memo_does_not_store_failures():
+    soup_memo = memo.SoupMemo()
+
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        soup_memo.get('key', 1, fail)
+    assert soup_memo.get('key', 1, lambda: 'soup') == 'soup'
+    assert soup_memo.in_flight == {}
+
+
+def test_get_soup_reuses_parsed_page(tempfile_session, site_server):
+    tempfile_session.cache_stats = Counter()
+    tempfile_session.soup_memo = memo.SoupMemo()
+    url = site_server + '3/'
+    first = utils.get_soup(tempfile_session, url)
+    assert utils.get_soup(tempfile_session, url) is first
+    assert utils.get_soup(
+        tempfile_session, url, parse_only={'name': 'a'}
+    ) is not first
+    assert tempfile_session.soup_memo.hits == 1
+    assert tempfile_session.cache_stats == {'miss': 1, 'hit': 2}
+
+
+@pytest.mark.parametrize('parse_workers', [None, 2])
+def test_crawl_reuses_extracted_results(
+        tempfile_session, site_server, parse_workers
+):
+    from argparse import Namespace
+    from functools import partial
+    from src import engines, extractors
+
+    tempfile_session.extract_memo = memo.SoupMemo()
+    urls = [site_server + 'pep-0401/', site_server + 'pep-3099/']
+    for _ in range(2):
+        # Режимы создают partial заново при каждом запуске.
+        got = list(engines.crawl(
+            tempfile_session,
+            urls,
+            partial(
+                extractors.extract_with_fingerprint,
+                extractors.extract_pep_status
+            ),
+            Namespace(workers=2, parse_workers=parse_workers)
+        ))
+    assert [status for _, (status, _) in got] == ['April Fool!', 'Final']
+    assert (
+        tempfile_session.extract_memo.hits,
+        tempfile_session.extract_memo.misses
+    ) == (2, 2)
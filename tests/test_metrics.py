@@ -0,0 +1,72 @@
+import logging
+
+try:
+    from src import metrics
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `metrics.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `metrics.py`'
+
+
+def test_metrics_handler_sums_log_extras():
+    handler = metrics.MetricsHandler()
+    logger = logging.getLogger('test_metrics')
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning('start')
+        logger.warning('bad', extra={'metrics': {'bad_links': 2}})
+        logger.warning('bad', extra={'metrics': {'bad_links': 1}})
+        logger.warning('finish', extra={'metrics': {
+            'pages_fetched': 4, 'cache_hits': 3, 'run_success': 1
+        }})
+    finally:
+        logger.removeHandler(handler)
+    values = handler.collect()
+    assert values['bad_links'] == 3
+    assert values['cache_hit_ratio'] == 0.75
+    assert values['run_success'] == 1
+    assert values['run_duration_seconds'] >= 0
+
+
+def test_pep_logs_metrics(caplog, tempfile_session, site_main):
+    with caplog.at_level(logging.INFO):
+        site_main.pep(tempfile_session)
+    handler = metrics.MetricsHandler()
+    for record in caplog.records:
+        handler.handle(record)
+    values = handler.collect()
+    assert values['mismatched_statuses'] == 1
+    assert values['empty_type_status'] == 1
+    assert values['bad_links'] == 0
+
+
+def test_write_metrics(tmp_path):
+    path = tmp_path / 'parser.prom'
+    values = dict.fromkeys(metrics.METRICS, 0)
+    values['pages_fetched'] = 7
+    metrics.write_metrics(path, values, labels={'mode': 'pep'})
+    text = path.read_text(encoding='utf-8')
+    assert 'pep_parser_pages_fetched{mode="pep"} 7\n' in text
+    assert '# TYPE pep_parser_run_success gauge' in text
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_run_metrics_count_each_download_once(site_main):
+    from collections import Counter
+    from types import SimpleNamespace
+
+    session = SimpleNamespace(
+        cache_stats=Counter(hit=2, revalidated=1, miss=1, shared=4)
+    )
+    site_main.profiler.reset()
+    try:
+        site_main.profiler.record('get_response', 0.1, 900)
+        site_main.profiler.record('fetch_response/cache', 0.1, 300)
+        site_main.profiler.record('fetch_response/network', 0.1, 100)
+        values = site_main.run_metrics(session)
+    finally:
+        site_main.profiler.reset()
+    assert values['pages_fetched'] == 4
+    assert values['cache_hits'] == 3
+    assert values['bytes_downloaded'] == 100
@@ -0,0 +1,91 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+from requests import RequestException
+
+from src import main, utils
+
+
+class SlowSession:
+    def __init__(self):
+        self.calls = Counter()
+        self.cache_stats = Counter()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        with self.lock:
+            self.calls[url] += 1
+        time.sleep(0.2)
+        if url.endswith('/bad'):
+            raise RequestException('сбой')
+        response = type('Response', (), {})()
+        response.url = url
+        return response
+
+
+@pytest.mark.parametrize('path', ['/good', '/bad'])
+def test_get_response_deduplicates_in_flight(path):
+    session = SlowSession()
+    url = 'https://docs.python.org' + path
+
+    def fetch(_):
+        try:
+            return utils.get_response(session, url)
+        except ConnectionError as error:
+            return error
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(fetch, range(5)))
+    assert session.calls[url] == 1
+    assert session.cache_stats['shared'] == 4
+    assert len({id(result) for result in results}) == 1
+    assert session.in_flight == {}
+
+
+def parse_modes(*modes):
+    return main.configure_argument_parser(
+        (*main.MODE_TO_FUNCTION, main.ALL_MODES)
+    ).parse_args(modes)
+
+
+def test_select_modes():
+    assert [
+        mode_args.mode for mode_args in main.select_modes(parse_modes('all'))
+    ] == list(main.MODE_TO_FUNCTION)
+    selected = main.select_modes(parse_modes('pep', 'whats-new', 'pep'))
+    assert [mode_args.mode for mode_args in selected] == ['pep', 'whats-new']
+
+
+def test_collect_results_shares_session(tempfile_session, site_main):
+    tempfile_session.cache_stats = Counter()
+    tempfile_session.in_flight = {}
+    collected = site_main.collect_results(
+        tempfile_session,
+        site_main.select_modes(parse_modes('latest-versions', 'pep'))
+    )
+    assert [mode_args.mode for mode_args, _ in collected] == [
+        'latest-versions', 'pep'
+    ]
+    latest_versions, pep = (results for _, results in collected)
+    assert latest_versions == site_main.latest_versions(tempfile_session)
+    assert pep[-1][1] == 7
+
+
+def test_collect_results_skips_failed_mode(
+    monkeypatch, tempfile_session, site_main
+):
+    def broken_mode(session, cli_args=None):
+        raise ConnectionError('сбой')
+
+    monkeypatch.setitem(site_main.MODE_TO_FUNCTION, 'pep', broken_mode)
+    collected = site_main.collect_results(
+        tempfile_session,
+        site_main.select_modes(parse_modes('latest-versions', 'pep'))
+    )
+    assert [mode_args.mode for mode_args, _ in collected] == [
+        'latest-versions'
+    ]
@@ -90,3 +90,70 @@ def test_output_file():
     assert hasattr(outputs, 'file_output'), (
         'Напишите функцию `file_output` в модуле `output.py`'
     )
+
+
+def test_file_output_keeps_rows_on_failure(monkeypatch, tmp_path):
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+
+    def rows():
+        yield ('Статус', 'Количество')
+        yield ('Active', 1)
+        raise ConnectionError('обрыв')
+
+    with pytest.raises(ConnectionError):
+        outputs.control_output(rows(), cli_args('pep', 'file'))
+    [output_file] = Path(tmp_path).glob('results/*.csv')
+    assert output_file.read_text(encoding='utf-8').splitlines() == [
+        '"Статус","Количество"', '"Active","1"'
+    ]
+
+
+def test_outputs_accept_generators(capsys, records):
+    rows = records('whats-new')
+    for output in (None, 'pretty'):
+        outputs.control_output(iter(rows), cli_args('whats-new', output))
+        captured_out, _ = capsys.readouterr()
+        assert rows[1][0] in captured_out
+
+
+@pytest.mark.parametrize('mode', ['whats-new', 'latest-versions', 'pep'])
+def test_jsonl_output(monkeypatch, tmp_path, records, mode):
+    import json
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    rows = records(mode)
+    outputs.control_output(rows, cli_args(mode, 'jsonl'))
+    [output_file] = Path(tmp_path).glob('results/*.jsonl')
+    assert [
+        json.loads(line)
+        for line in output_file.read_text(encoding='utf-8').splitlines()
+    ] == [dict(zip(rows[0], row)) for row in rows[1:]]
+
+
+def test_columnar_output(monkeypatch, tmp_path):
+    from src import columnar
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    monkeypatch.setattr(
+        outputs, 'get_extension', lambda: columnar.TYPED_COLUMNS_EXTENSION
+    )
+    rows = [('Статус', 'Количество'), ('Active', 36), ('Final', 246)]
+    outputs.control_output(rows, cli_args('pep', 'columnar'))
+    [output_file] = Path(tmp_path).glob('results/*.pepcol')
+    assert columnar.read_typed_columns(output_file) == {
+        'Статус': ['Active', 'Final'], 'Количество': [36, 246]
+    }
+
+
+def test_sqlite_output(monkeypatch, tmp_path):
+    import sqlite3
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    monkeypatch.setattr(outputs, 'SQLITE_BATCH_SIZE', 2)
+    rows = [('Статус', 'Количество'), ('Active', 36), ('Final', 246),
+            ('Draft', 35)]
+    for _ in range(2):
+        outputs.control_output(iter(rows), cli_args('pep', 'sqlite'))
+    connection = sqlite3.connect(Path(tmp_path) / 'results/results.sqlite3')
+    got = connection.execute(
+        'SELECT "Статус", "Количество" FROM pep'
+    ).fetchall()
+    connection.close()
+    assert got == rows[1:] * 2
@@ -0,0 +1,70 @@
+from argparse import Namespace
+import json
+
+import pytest
+
+from src import pep_metadata
+
+BULK_ARGS = Namespace(pep_source='bulk')
+EXPECTED = [
+    ('Статус', 'Количество'),
+    ('Active', 5),
+    ('Draft', 1),
+    ('Final', 1),
+    ('Общее количество', 7),
+]
+
+
+@pytest.fixture
+def peps_json_file(monkeypatch, site_main, tmp_path):
+    path = tmp_path / 'peps.json'
+    monkeypatch.setattr(site_main, 'PEPS_JSON_FILE', path)
+    return path
+
+
+def test_split_by_bulk_statuses():
+    pep_list = [
+        ('https://peps.python.org/pep-0008/', 'A', 'a', 'P'),
+        ('https://peps.python.org/pep-0401/', 'R', 'b', 'S'),
+        ('https://peps.python.org/pep-3099/', 'F', 'c', 'P'),
+    ]
+    statuses, pages_list = pep_metadata.split_by_bulk_statuses(
+        pep_list, {8: 'Active', 401: 'April Fool!'}
+    )
+    assert statuses == {'https://peps.python.org/pep-0008/': 'Active'}
+    assert pages_list == pep_list[1:]
+
+
+def test_parse_pep_statuses_rejects_unexpected_document():
+    with pytest.raises(ValueError):
+        pep_metadata.parse_pep_statuses(b'{"8": "Active"}')
+
+
+def test_pep_bulk_source_fetches_only_disagreeing_pages(
+    caplog, site_main, tempfile_session, peps_json_file
+):
+    caplog.set_level('INFO')
+    assert site_main.pep(tempfile_session, BULK_ARGS) == EXPECTED
+    assert 'загружается страниц: 2' in caplog.text
+    assert json.loads(peps_json_file.read_text())['8']['status'] == 'Active'
+
+
+def test_pep_bulk_source_uses_local_copy_offline(
+    monkeypatch, site_main, site_server, tempfile_session, peps_json_file
+):
+    site_main.pep(tempfile_session, BULK_ARGS)
+    monkeypatch.setattr(site_main, 'PEPS_JSON_PATH', 'api/missing.json')
+    statuses, pages_list = site_main.get_pep_bulk_statuses(
+        tempfile_session, site_main.get_pep_list(tempfile_session)[0],
+        BULK_ARGS
+    )
+    assert statuses[site_server + 'pep-0008/'] == 'Active'
+    assert len(pages_list) == 2
+
+
+def test_pep_bulk_source_falls_back_to_pages(
+    monkeypatch, site_main, tempfile_session, peps_json_file
+):
+    monkeypatch.setattr(site_main, 'PEPS_JSON_PATH', 'api/missing.json')
+    assert site_main.pep(tempfile_session, BULK_ARGS) == EXPECTED
+    assert not peps_json_file.exists()
@@ -0,0 +1,130 @@
+from argparse import Namespace
+
+import pytest
+
+from src import outputs, pep_table
+
+PEP_LIST = [
+    ('pep-1', 'A', 'a', 'P'),
+    ('pep-2', 'F', 'b', 'S'),
+    ('pep-3', 'A', 'c', 'I'),
+    ('pep-4', 'R', 'd', 'S'),
+    ('pep-5', '', 'e', ''),
+    ('pep-1', 'A', 'a', 'P'),
+]
+PAGE_STATUSES = {
+    'pep-1': 'Active',
+    'pep-2': 'Final',
+    'pep-3': 'Accepted',
+    'pep-4': 'Final',
+    'pep-5': None,
+}
+
+
+def test_reconcile_groups_status_pairs():
+    table = pep_table.make_pep_table(PEP_LIST, PAGE_STATUSES)
+    matched, mismatched, missing = pep_table.reconcile(table)
+    assert list(matched.items()) == [
+        ('Active', 2), ('Final', 1), ('Accepted', 1)
+    ]
+    assert mismatched == {('R', 'Final'): 1}
+    assert missing == 1
+    assert pep_table.select_links(table, mismatched) == [
+        ('pep-4', 'R', 'Final')
+    ]
+    assert pep_table.missing_links(table) == ['pep-5']
+
+
+TYPE_STATUS_ROWS = [
+    ('P', 'Active', 2),
+    ('S', 'Final', 2),
+    ('I', 'Accepted', 1),
+    ('P', 'Общее количество', 2),
+    ('S', 'Общее количество', 2),
+    ('I', 'Общее количество', 1),
+    ('Общее количество', 'Active', 2),
+    ('Общее количество', 'Final', 2),
+    ('Общее количество', 'Accepted', 1),
+    ('Общее количество', 'Общее количество', 5),
+]
+
+
+def test_type_status_rows_adds_totals():
+    table = pep_table.make_pep_table(PEP_LIST, PAGE_STATUSES)
+    assert list(pep_table.type_status_rows(table)) == [
+        ('Тип', 'Статус', 'Количество'), *TYPE_STATUS_ROWS
+    ]
+
+
+def test_pep_tables_share_sqlite_database(monkeypatch, tmp_path):
+    import sqlite3
+    monkeypatch.setattr(outputs, 'BASE_DIR', tmp_path)
+    table = pep_table.make_pep_table(PEP_LIST, PAGE_STATUSES)
+    matched, _, _ = pep_table.reconcile(table)
+    for rows, kind in (
+        (pep_table.status_rows(matched), 'statuses'),
+        (pep_table.type_status_rows(table), 'types'),
+        (pep_table.type_status_rows(table), 'types'),
+    ):
+        outputs.control_output(
+            rows, Namespace(mode='pep', output='sqlite', pep_table=kind)
+        )
+    connection = sqlite3.connect(tmp_path / 'results' / 'results.sqlite3')
+    statuses = connection.execute(
+        'SELECT "Статус", "Количество" FROM pep'
+    ).fetchall()
+    types = connection.execute(
+        'SELECT "Тип", "Статус", "Количество" FROM pep_types'
+    ).fetchall()
+    connection.close()
+    assert statuses == [
+        ('Active', 2), ('Final', 1), ('Accepted', 1), ('Общее количество', 4)
+    ]
+    assert types == TYPE_STATUS_ROWS * 2
+
+
+def test_file_name_includes_pep_table(monkeypatch, tmp_path):
+    monkeypatch.setattr(outputs, 'BASE_DIR', tmp_path)
+    names = [
+        outputs.get_file_path(
+            '{parser_mode}.csv', Namespace(mode=mode, pep_table=kind)
+        ).name
+        for mode, kind in (
+            ('pep', 'mismatches'), ('pep', 'statuses'),
+            ('whats-new', 'mismatches')
+        )
+    ]
+    assert names == ['pep_mismatches.csv', 'pep.csv', 'whats-new.csv']
+
+
+def test_empty_pep_list():
+    table = pep_table.make_pep_table([], {})
+    assert pep_table.reconcile(table) == ({}, {}, 0)
+    assert list(pep_table.status_rows({})) == [
+        ('Статус', 'Количество'), ('Общее количество', 0)
+    ]
+
+
+@pytest.mark.parametrize('table, expected', [
+    ('statuses', [
+        ('Статус', 'Количество'),
+        ('Active', 5),
+        ('Draft', 1),
+        ('Final', 1),
+        ('Общее количество', 7),
+    ]),
+    ('mismatches', [
+        ('Статус из списка', 'Статус на странице', 'Количество'),
+        ('R', 'April Fool!', 1),
+    ]),
+])
+def test_pep_tables(site_main, tempfile_session, table, expected):
+    assert site_main.pep(
+        tempfile_session, Namespace(pep_table=table)
+    ) == expected
+
+
+def test_pep_types_table_counts_every_row(site_main, tempfile_session):
+    rows = site_main.pep(tempfile_session, Namespace(pep_table='types'))
+    assert rows[0] == ('Тип', 'Статус', 'Количество')
+    assert rows[-1] == ('Общее количество', 'Общее количество', 8)
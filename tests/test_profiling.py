@@ -0,0 +1,75 @@
+import json
+import time
+
+import pytest
+
+try:
+    from src import profiling
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `profiling.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `profiling.py`'
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    profiler = profiling.Profiler()
+    profiler.enable()
+    monkeypatch.setattr(profiling, 'profiler', profiler)
+    return profiler
+
+
+def test_profiled_disabled(monkeypatch):
+    monkeypatch.setattr(profiling, 'profiler', profiling.Profiler())
+
+    @profiling.profiled('stage')
+    def stage():
+        return 'result'
+
+    assert stage() == 'result'
+    assert profiling.profiler.summary() == []
+
+
+def test_profiled_sizes_and_kinds(profiler):
+    @profiling.profiled('fetch', size=len, kind=lambda text: 'cache')
+    def fetch(text):
+        return text
+
+    @profiling.profiled('fail')
+    def fail():
+        raise ValueError
+
+    fetch('abc')
+    fetch('de')
+    with pytest.raises(ValueError):
+        fail()
+    summary = {row[0]: row for row in profiler.summary()}
+    assert summary.keys() == {'fetch', 'fetch/cache', 'fail'}
+    assert summary['fetch'][1] == 2
+    assert summary['fetch'][-1] == 5
+    assert summary['fail'][1] == 1
+    assert summary['fail'][-1] is None
+
+
+def test_profiled_output_excludes_rows(profiler, tmp_path):
+    def slow_rows():
+        yield 'head',
+        time.sleep(0.2)
+        yield 'row',
+
+    def output(results, **kwargs):
+        assert list(results) == [('head',), ('row',)]
+
+    profiling.profiled_output('output', output, slow_rows())
+    assert profiler.summary()[0][2] < 0.1
+    path = tmp_path / 'profile.json'
+    profiler.dump_json(path)
+    assert json.loads(path.read_text())[0]['stage'] == 'output'
+    assert 'output' in profiler.summary_table()
+
+
+def test_cprofile_to(tmp_path):
+    path = tmp_path / 'mode.pstats'
+    with profiling.cprofile_to(path):
+        sum(range(10))
+    assert path.stat().st_size > 0
@@ -0,0 +1,186 @@
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import pytest
+import requests
+
+from src import retries, utils
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Отвечает ошибками заданное число раз, затем страницей.
+
+    /fail/N — N раз 503 с Retry-After, /slow/N — N раз не отвечает
+    дольше таймаута, /down — всегда 500, остальное — сразу 200.
+    Пока не наступил down_until, на любой путь отвечает 500.
+    """
+    calls = Counter()
+    lock = threading.Lock()
+    # До этого момента (time.monotonic) сервер отвечает 500 на всё.
+    down_until = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            self.calls[self.path] += 1
+            call = self.calls[self.path]
+        kind, _, count = self.path.strip('/').partition('/')
+        failing = call <= int(count or 0)
+        if time.monotonic() < self.down_until:
+            kind = 'down'
+        if kind == 'down' or (kind == 'fail' and failing):
+            self.send_response(500 if kind == 'down' else 503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if kind == 'slow' and failing:
+            time.sleep(0.5)
+        body = b'<html>ok</html>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@contextmanager
+def serve_flaky():
+    FlakyHandler.calls.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}/'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def flaky_server():
+    with serve_flaky() as url:
+        yield url
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(retries.time, 'sleep', delays.append)
+    return delays
+
+
+def make_session(**policy_kwargs):
+    session = requests.Session()
+    session.cache_stats = Counter()
+    session.retry_policy = retries.RetryPolicy(**policy_kwargs)
+    return session
+
+
+def test_retries_server_errors(flaky_server, sleeps):
+    session = make_session(retries=3, backoff=0.1)
+    url = flaky_server + 'fail/2'
+    assert utils.get_response(session, url).text == '<html>ok</html>'
+    assert FlakyHandler.calls['/fail/2'] == 3
+    assert session.retry_policy.retried == {url: 2}
+    assert session.retry_policy.failed == []
+    assert len(sleeps) == 2
+    assert all(0 <= delay <= 0.2 for delay in sleeps)
+
+
+def test_retries_timeouts(flaky_server, sleeps):
+    session = make_session(retries=1, timeout=0.2)
+    assert utils.get_response(
+        session, flaky_server + 'slow/1'
+    ).text == '<html>ok</html>'
+    assert len(sleeps) == 1
+
+
+def test_gives_up_after_retries(flaky_server, sleeps):
+    session = make_session(retries=2)
+    url = flaky_server + 'down'
+    with pytest.raises(ConnectionError):
+        utils.get_response(session, url)
+    assert FlakyHandler.calls['/down'] == 3
+    assert session.retry_policy.failed == [url]
+
+
+def open_circuit(policy, host):
+    for _ in range(policy.failure_threshold):
+        policy.record(host, success=False)
+    return policy.opened_at[host]
+
+
+def test_circuit_breaker_waits_for_trial_request(
+    monkeypatch, flaky_server, sleeps
+):
+    session = make_session(retries=0, failure_threshold=2, reset_after=30)
+    opened_at = open_circuit(session.retry_policy, flaky_server[7:-1])
+    monkeypatch.setattr(
+        retries.time, 'monotonic', lambda: opened_at + 31
+    )
+    assert utils.get_response(session, flaky_server + 'ok').status_code == 200
+    assert session.retry_policy.opened_at == {}
+
+
+def test_circuit_breaker_rejects_waiters_after_failed_trial(flaky_server):
+    session = make_session(
+        retries=0, timeout=0.2, failure_threshold=2, reset_after=0.2
+    )
+    policy = session.retry_policy
+    host = flaky_server[7:-1]
+    open_circuit(policy, host)
+    # Пробный запрос не дождётся ответа за таймаут.
+    trial = threading.Thread(
+        target=utils.get_response, args=(session, flaky_server + 'slow/1')
+    )
+    trial.start()
+    while host not in policy.trials:
+        time.sleep(0.01)
+    with pytest.raises(ConnectionError, match='приостановлены'):
+        utils.get_response(session, flaky_server + 'ok')
+    trial.join()
+    assert FlakyHandler.calls['/ok'] == 0
+
+
+def test_short_outage_does_not_lose_pages(monkeypatch, flaky_server):
+    from argparse import Namespace
+    from src import engines
+
+    # Порог меньше числа попыток: цепь размыкается раньше, чем
+    # у запроса кончатся попытки, как бы медленно ни стартовали потоки.
+    session = make_session(
+        retries=2, backoff=0.01, failure_threshold=2, reset_after=0.5
+    )
+    monkeypatch.setattr(
+        FlakyHandler, 'down_until', time.monotonic() + 0.3
+    )
+    urls = [flaky_server + f'page/{number}' for number in range(40)]
+    got = list(engines.crawl(
+        session, urls, len, Namespace(workers=8)
+    ))
+    assert [url for url, _ in got] == urls
+    assert all(result is not None for _, result in got)
+    assert session.retry_policy.opened_at == {}
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('3', 3.0),
+    ('-1', 0.0),
+    ('Wed, 21 Oct 2015 07:28:00 GMT', 0.0),
+    ('soon', None),
+])
+def test_parse_retry_after(value, expected):
+    assert retries.parse_retry_after(value) == expected
+
+
+def test_delay_honours_retry_after():
+    policy = retries.RetryPolicy(backoff=0.1, max_backoff=1)
+    assert policy.delay(10) <= 1
+    assert policy.delay(0, retry_after=5) == 5
@@ -0,0 +1,48 @@
+from argparse import Namespace
+from collections import Counter
+from pathlib import Path
+import pickle
+import sqlite3
+
+import pytest
+
+from src import columnar, outputs, pep_table, rows
+
+
+def test_schema_is_header_with_types():
+    schema = rows.PEP_STATUS_SCHEMA
+    assert schema == ('Статус', 'Количество')
+    assert schema.types == (str, int)
+    assert pickle.loads(pickle.dumps(schema)).types == (str, int)
+    with pytest.raises(ValueError):
+        rows.Schema(('Статус', 'Количество'), (str,))
+
+
+def test_status_rows_are_typed():
+    got = list(pep_table.status_rows(Counter({'Active': 2, 'Final': 1})))
+    assert got[0].types == (str, int)
+    assert [row.count for row in got[1:]] == [2, 1, 3]
+    assert got[1:] == [('Active', 2), ('Final', 1), ('Общее количество', 3)]
+
+
+def test_sqlite_output_uses_schema_types(monkeypatch, tmp_path):
+    monkeypatch.setattr(outputs, 'BASE_DIR', Path(tmp_path))
+    outputs.control_output(
+        [rows.PEP_STATUS_SCHEMA],
+        Namespace(mode='pep', output='sqlite')
+    )
+    connection = sqlite3.connect(Path(tmp_path) / 'results/results.sqlite3')
+    got = [
+        column[2]
+        for column in connection.execute('PRAGMA table_info(pep)')
+    ]
+    connection.close()
+    assert got == ['TEXT', 'TEXT', 'INTEGER']
+
+
+def test_columns_use_schema_types():
+    schema = rows.Schema(('Версия', 'Количество'), (str, int))
+    assert columnar.to_columns([], schema) == {
+        'Версия': (columnar.STRING_TYPE, ()),
+        'Количество': (columnar.INT_TYPE, ()),
+    }
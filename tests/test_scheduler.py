@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from src import main, ratelimit, scheduled_adapter, utils
+
+URL = 'https://peps.python.org/pep-0008/'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_scheduler_halves_and_recovers_concurrency(monkeypatch, clock):
+    scheduler = ratelimit.AdaptiveScheduler(max_concurrency=8, rate=10)
+    scheduler.release(URL, scheduler.acquire(URL), 200)
+    scheduler.release(URL, scheduler.acquire(URL), 503)
+    state = scheduler.hosts['peps.python.org']
+    assert state.concurrency == 4
+    assert state.rate == 5
+    assert scheduler.limiter.intervals['peps.python.org'] == 0.2
+    monkeypatch.setattr(scheduler.limiter, 'reserve', lambda url: 0)
+    for _ in range(20):
+        started = scheduler.acquire(URL)
+        clock[0] += 0.1
+        scheduler.release(URL, started, 200)
+    assert 7 < state.concurrency <= 8
+    assert state.rate == pytest.approx(7)
+    report, = scheduler.throughput()
+    assert report.requests == 22
+    assert report.slowdowns == 1
+
+
+def test_scheduler_slows_down_on_latency_spike(clock):
+    scheduler = ratelimit.AdaptiveScheduler(max_concurrency=4)
+    for latency in (0.1, 0.1, 1.0, 0.1, 0.1, 0.1, 0.1, 1.0):
+        started = scheduler.acquire(URL)
+        clock[0] += latency
+        scheduler.release(URL, started, 200)
+    # Первый всплеск пришёлся на разогрев и не учитывается.
+    assert scheduler.hosts['peps.python.org'].slowdowns == 1
+    assert scheduler.hosts['peps.python.org'].concurrency == 2
+
+
+def test_scheduler_ignores_fast_latency_noise(clock):
+    scheduler = ratelimit.AdaptiveScheduler(max_concurrency=4)
+    for latency in (0.001, 0.001, 0.001, 0.001, 0.001, 0.01, 0.2):
+        started = scheduler.acquire(URL)
+        clock[0] += latency
+        scheduler.release(URL, started, 200)
+    assert scheduler.hosts['peps.python.org'].slowdowns == 0
+
+
+def test_scheduler_limits_concurrency():
+    scheduler = ratelimit.AdaptiveScheduler(max_concurrency=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def request():
+        started = scheduler.acquire(URL)
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        scheduler.release(URL, started, 200)
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+
+
+def test_fresh_cache_hits_bypass_scheduler(
+        monkeypatch, tempfile_session, site_server
+):
+    scheduler = ratelimit.AdaptiveScheduler(max_concurrency=1)
+    tempfile_session.mount(
+        'http://', scheduled_adapter.ScheduledAdapter(scheduler)
+    )
+    lookups = []
+    get_cached = tempfile_session.cache.get_response
+    monkeypatch.setattr(
+        tempfile_session.cache,
+        'get_response',
+        lambda *args, **kwargs: lookups.append(1) or get_cached(
+            *args, **kwargs
+        )
+    )
+    for _ in range(3):
+        utils.get_response(tempfile_session, site_server + 'pep-0008/')
+    report, = scheduler.throughput()
+    assert report.requests == 1
+    assert len(lookups) == 3
+
+
+@pytest.mark.parametrize('rate, expected', [
+    (None, 'одновременных запросов 4, замедлений 1'),
+    (2.5, 'одновременных запросов 4, частота 2.5 в секунду, замедлений 1'),
+])
+def test_throughput_message_mentions_rate_only_when_limited(rate, expected):
+    message = main.throughput_message(ratelimit.HostThroughput(
+        'peps.python.org', 10, 2.0, 5.0, 4, rate, 1
+    ))
+    assert message.endswith(expected)
@@ -0,0 +1,165 @@
+import sys
+
+import pytest
+
+from src import segment_cache
+
+PAGE = b'<html><nav>menu</nav><main>%d</main><footer>...</footer></html>'
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = segment_cache.SegmentStorage(
+        tmp_path / 'cache', serializer=None
+    )
+    yield storage
+    storage.close()
+
+
+def test_storage_round_trip(storage):
+    storage['a'] = PAGE % 1
+    storage['b'] = PAGE % 2
+    storage['a'] = PAGE % 3
+    del storage['b']
+    assert storage['a'] == PAGE % 3
+    assert 'b' not in storage
+    assert list(storage) == ['a']
+    with pytest.raises(KeyError):
+        storage['b']
+
+
+@pytest.mark.parametrize('save_index', [True, False])
+def test_storage_reopens_with_or_without_index(tmp_path, save_index):
+    storage = segment_cache.SegmentStorage(tmp_path / 'cache', serializer=None)
+    for number in range(3):
+        storage[str(number)] = PAGE % number
+    if save_index:
+        storage.close()
+        storage = segment_cache.SegmentStorage(
+            tmp_path / 'cache', serializer=None
+        )
+    del storage['1']
+    storage['3'] = PAGE % 3
+    reopened = segment_cache.SegmentStorage(
+        tmp_path / 'cache', serializer=None
+    )
+    assert {key: reopened[key] for key in reopened} == {
+        '0': PAGE % 0, '2': PAGE % 2, '3': PAGE % 3
+    }
+    reopened.close()
+    storage.close()
+
+
+def test_storage_drops_torn_record(tmp_path):
+    storage = segment_cache.SegmentStorage(tmp_path / 'cache', serializer=None)
+    storage['a'] = PAGE % 1
+    storage['b'] = PAGE % 2
+    storage.map.close()
+    storage.file.truncate(storage.file.tell() - 3)
+    storage.file.close()
+    reopened = segment_cache.SegmentStorage(
+        tmp_path / 'cache', serializer=None
+    )
+    assert list(reopened) == ['a']
+    reopened['c'] = PAGE % 3
+    assert reopened['c'] == PAGE % 3
+    reopened.close()
+
+
+def test_storage_evicts_least_recently_used(tmp_path):
+    storage = segment_cache.SegmentStorage(tmp_path / 'cache', serializer=None)
+    storage['a'] = PAGE % 1
+    record_size = storage.live_bytes
+    storage.max_bytes = record_size * 2 + record_size // 2
+    storage['b'] = PAGE % 2
+    storage['a']
+    storage['c'] = PAGE % 3
+    assert list(storage) == ['a', 'c']
+    storage.close()
+
+
+def test_vacuum_keeps_only_live_records(storage):
+    for number in range(50):
+        storage['page'] = PAGE % number
+    size = storage.segment_path.stat().st_size
+    storage.vacuum()
+    assert storage.segment_path.stat().st_size < size
+    assert storage['page'] == PAGE % 49
+
+
+def test_zdict_only_when_it_pays_off(tmp_path):
+    import os
+    import random
+    shared = random.Random(0).randbytes(4000)
+    noise = segment_cache.SegmentStorage(tmp_path / 'noise', serializer=None)
+    pages = segment_cache.SegmentStorage(tmp_path / 'pages', serializer=None)
+    for number in range(segment_cache.ZDICT_SAMPLES + 8):
+        noise[str(number)] = os.urandom(500)
+        pages[str(number)] = shared + PAGE % number
+    noise.vacuum()
+    assert not noise.zdict_path.exists()
+    assert pages.zdict_path.exists()
+    size = pages.size()
+    pages.vacuum()
+    assert pages.size() < size / 2
+    noise.close()
+    pages.close()
+    reopened = segment_cache.SegmentStorage(
+        tmp_path / 'pages', serializer=None
+    )
+    assert reopened['0'] == shared + PAGE % 0
+    assert reopened['39'] == shared + PAGE % 39
+    reopened.close()
+
+
+def test_storages_share_files(tmp_path):
+    first = segment_cache.SegmentStorage(tmp_path / 'cache', serializer=None)
+    second = segment_cache.SegmentStorage(tmp_path / 'cache', serializer=None)
+    first['a'] = PAGE % 1
+    second['b'] = PAGE % 2
+    first['c'] = PAGE % 3
+    first.vacuum()
+    second['d'] = PAGE % 4
+    second.close()
+    first.close()
+    reopened = segment_cache.SegmentStorage(
+        tmp_path / 'cache', serializer=None
+    )
+    assert {key: reopened[key] for key in reopened} == {
+        'a': PAGE % 1, 'b': PAGE % 2, 'c': PAGE % 3, 'd': PAGE % 4
+    }
+    reopened.close()
+
+
+def test_segments_cache_backend(site_main, site_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cli_args = site_main.configure_argument_parser(
+        site_main.MODE_TO_FUNCTION.keys()
+    ).parse_args(['pep', '--cache-backend', 'segments'])
+    for from_cache in (False, True):
+        session = site_main.configure_session(cli_args)
+        assert type(session.cache).__name__ == 'SegmentCache'
+        assert session.get(site_server).from_cache is from_cache
+        session.close()
+    session = site_main.configure_session(cli_args)
+    size_before, size_after = site_main.compact_cache(session)
+    assert size_after <= size_before
+    assert session.get(site_server).from_cache
+    session.close()
+
+
+@pytest.mark.parametrize('watch', [[], ['--watch', '60']])
+def test_main_saves_segments_index(site_main, tmp_path, monkeypatch, watch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        sys, 'argv',
+        ['main.py', 'latest-versions', '--cache-backend', 'segments', *watch]
+    )
+    monkeypatch.setattr(site_main, 'control_output', lambda *args: None)
+
+    def stop(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(site_main.time, 'sleep', stop)
+    site_main.main()
+    assert (tmp_path / 'http_cache.idx').exists()
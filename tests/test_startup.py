@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+from conftest import SRC_DIR
+
+# Модули, которые должны загружаться только режимами и выводами,
+# которым они нужны.
+HEAVY_MODULES = (
+    'requests', 'requests_cache', 'tqdm', 'bs4', 'lxml', 'prettytable',
+    'asyncio', 'multiprocessing'
+)
+# Запас в несколько раз к холодному импорту main на момент замера
+# (около 50 мс против 350 мс до отложенных импортов).
+IMPORT_TIME_BUDGET_US = 200_000
+HELP_SCRIPT = (
+    'import main; '
+    'main.configure_argument_parser(main.MODE_TO_FUNCTION.keys())'
+    '.format_help()'
+)
+
+
+def import_times(code):
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_startup_skips_heavy_modules():
+    imported = import_times(HELP_SCRIPT)
+    assert 'main' in imported
+    assert not [
+        module for module in HEAVY_MODULES if module in imported
+    ]
+
+
+def test_startup_import_budget():
+    # Берётся лучший из нескольких запусков, чтобы не зависеть
+    # от случайной нагрузки на машину.
+    best = min(import_times('import main')['main'] for _ in range(3))
+    assert best < IMPORT_TIME_BUDGET_US, (
+        f'Импорт main занял {best / 1000:.0f} мс'
+    )
@@ -0,0 +1,37 @@
+from argparse import Namespace
+
+try:
+    from src import state
+except ModuleNotFoundError:
+    assert False, 'Убедитесь что в директории `src` есть файл `state.py`'
+except ImportError:
+    assert False, 'Убедитесь что в директории `src` есть файл `state.py`'
+
+
+def test_state_roundtrip(tmp_path):
+    path = tmp_path / 'state.sqlite3'
+    records = {
+        'https://peps.python.org/pep-0008/': ('row', 'A', 'Active', 'page'),
+    }
+    state.save_pep_state(path, records)
+    state.save_pep_state(path, records)
+    assert state.load_pep_state(path) == records
+
+
+def test_pep_incremental(monkeypatch, tmp_path, tempfile_session, site_main):
+    monkeypatch.setattr(site_main, 'PEP_STATE_FILE', tmp_path / 'state')
+    fetched = []
+    crawl = site_main.crawl
+
+    def spy_crawl(session, urls, extract, cli_args=None):
+        fetched.append(list(urls))
+        return crawl(session, urls, extract, cli_args)
+
+    monkeypatch.setattr(site_main, 'crawl', spy_crawl)
+    cli_args = Namespace(incremental=True, workers=2)
+    full = site_main.pep(tempfile_session)
+    first = site_main.pep(tempfile_session, cli_args)
+    second = site_main.pep(tempfile_session, cli_args)
+    assert first == second == full
+    assert len(fetched[1]) == 6
+    assert fetched[2] == []
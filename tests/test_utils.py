@@ -54,3 +54,18 @@ def test_get_response(mock_session):
             'делает запрос к странице и возвращает ответ. \n'
             'Кстати: You are breathtaken!'
         )
+
+
+def test_make_soup_parse_only():
+    from conftest import SITE_DIR
+    html = (SITE_DIR / 'pep-0008' / 'index.html').read_text(encoding='utf-8')
+    got = utils.make_soup(
+        html,
+        parse_only={
+            'name': 'dl', 'attrs': {'class': 'rfc2822 field-list simple'}
+        }
+    )
+    assert got.find('h1') is None
+    assert got.find('dl').text == utils.make_soup(html).find(
+        'dl', attrs={'class': 'rfc2822 field-list simple'}
+    ).text
@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.fixture
+def watch_args(site_main):
+    return site_main.configure_argument_parser(
+        site_main.MODE_TO_FUNCTION.keys()
+    ).parse_args(['latest-versions', '--watch', '60'])
+
+
+@pytest.fixture
+def watch_session(site_main, watch_args):
+    return site_main.configure_session(watch_args, backend='memory')
+
+
+def test_watch_outputs_only_changes(
+    monkeypatch, watch_session, site_main, watch_args
+):
+    outputs = []
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(
+        site_main, 'control_output',
+        lambda results, cli_args: outputs.append(results)
+    )
+    monkeypatch.setattr(site_main.time, 'sleep', fake_sleep)
+    site_main.watch(
+        watch_session, watch_args, site_main.MetricsHandler()
+    )
+    assert len(sleeps) == 3
+    assert all(0 < seconds <= 60 for seconds in sleeps)
+    assert len(outputs) == 1
+    assert outputs[0][0] == site_main.VERSION_SCHEMA
+
+
+def test_watch_survives_failed_run(
+    monkeypatch, watch_session, site_main, watch_args
+):
+    calls = []
+
+    def flaky_mode(session, cli_args=None):
+        calls.append(cli_args.mode)
+        if len(calls) == 1:
+            raise ConnectionError('сбой')
+        raise KeyboardInterrupt
+
+    monkeypatch.setitem(
+        site_main.MODE_TO_FUNCTION, 'latest-versions', flaky_mode
+    )
+    monkeypatch.setattr(site_main.time, 'sleep', lambda seconds: None)
+    site_main.watch(
+        watch_session, watch_args, site_main.MetricsHandler()
+    )
+    assert len(calls) == 2
@@ -0,0 +1,70 @@
+from argparse import Namespace
+import logging
+
+import pytest
+from requests import ConnectionError as RequestsConnectionError
+from requests.adapters import BaseAdapter
+from requests_cache import CachedSession
+
+
+class FailingAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        raise RequestsConnectionError(request.url)
+
+    def close(self):
+        pass
+
+
+def failing_session(site_server):
+    """Сессия, для которой одна страница PEP и одна страница
+    «What's New» не загружаются."""
+    session = CachedSession(backend='memory')
+    for path in ('pep-0020/', '3/whatsnew/3.11.html'):
+        session.mount(site_server + path, FailingAdapter())
+    return session
+
+
+def run_with_workers(caplog, site_server, mode_function, workers):
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        rows = mode_function(
+            failing_session(site_server), Namespace(workers=workers)
+        )
+    return rows, [record.getMessage() for record in caplog.records]
+
+
+@pytest.mark.parametrize('mode', ['pep', 'whats_new'])
+def test_results_do_not_depend_on_workers(
+        caplog, site_main, site_server, mode
+):
+    mode_function = getattr(site_main, mode)
+    sequential = run_with_workers(caplog, site_server, mode_function, 1)
+    assert any(
+        site_main.BAD_LINK.format(link=site_server + path) in message
+        for path in ('pep-0020/', '3/whatsnew/3.11.html')
+        for message in sequential[1]
+    )
+    for workers in (4, 8):
+        assert run_with_workers(
+            caplog, site_server, mode_function, workers
+        ) == sequential
+
+
+def test_pep_listed_in_two_tables_is_counted_per_row(site_main, site_server):
+    pep_links = [
+        link for link, *_ in site_main.get_pep_list(
+            CachedSession(backend='memory')
+        )[0]
+    ]
+    assert pep_links.count(site_server + 'pep-0001/') == 2
+    # PEP 1 и PEP 8 считаются по разу на каждую строку общего списка,
+    # PEP 20 не загрузился, у PEP 401 статусы не совпадают.
+    assert site_main.pep(
+        failing_session(site_server), Namespace(workers=4)
+    ) == [
+        ('Статус', 'Количество'),
+        ('Active', 4),
+        ('Draft', 1),
+        ('Final', 1),
+        ('Общее количество', 6),
+    ]